@@ -7,7 +7,118 @@ Utiliza Google Gemini API para conversas inteligentes
 import google.generativeai as genai
 import json
 import os
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.chat_sessions import ChatSessionStore, load_session_settings
+from core.intent_cache import IntentCache
+from core.intent_classifier import INTENT_FIELDS, IntentClassifier, normalize_intent
+from core.prompts import greeting, intent_prompt, lead_context, proposal_prompt, sales_instruction
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+SESSION_NOT_FOUND = "Erro: Sessão não encontrada. Inicie uma nova conversa."
+
+UNKNOWN_INTENT = {
+    "intencao": "desconhecida",
+    "nivel_interesse": "medio",
+    "sentimento": "neutro",
+    "resumo": "Não foi possível analisar",
+    "fonte": "llm"
+}
+
+# Turno combinado: o modelo do chat devolve a resposta e a análise em um único JSON
+COMBINED_TURN_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': {
+        'type': 'object',
+        'properties': dict(
+            {'resposta': {'type': 'string'}},
+            **{field: {'type': 'string', 'enum': list(values)} for field, values in INTENT_FIELDS.items()},
+            resumo={'type': 'string'}
+        ),
+        'required': ['resposta'] + list(INTENT_FIELDS)
+    }
+}
+
+
+DEFAULT_PARALLEL_SETTINGS = {
+    'ativo': True,
+    'max_threads': 8,
+    'timeout_intencao_segundos': 3.0
+}
+
+
+def load_ai_settings(config_path: str = CONFIG_PATH) -> Dict:
+    """Carrega a seção ia do config.json
+    
+    Args:
+        config_path: Caminho do arquivo de configuração
+        
+    Returns:
+        Configurações da IA (vazio se o arquivo não puder ser lido)
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('ia', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milissegundos desde `started` (time.perf_counter)"""
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def extract_json(text: str) -> Optional[Dict]:
+    """Extrai o objeto JSON de uma resposta do modelo
+    
+    Aceita blocos de código (```json) e texto em volta do objeto.
+    
+    Args:
+        text: Texto da resposta
+        
+    Returns:
+        Objeto decodificado, ou None se não houver um objeto JSON válido
+    """
+    text = (text or '').strip()
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def response_text(response) -> str:
+    """Texto de uma resposta do modelo ('' se bloqueada ou sem texto)"""
+    try:
+        return response.text
+    except ValueError:
+        return ''
+
+
+def parse_intent_response(response) -> Dict:
+    """Converte a resposta do modelo em uma análise de intenção
+    
+    Args:
+        response: Resposta do modelo ao prompt de intenção
+        
+    Returns:
+        Análise com rótulos normalizados e fonte "llm", ou a análise
+        "desconhecida" se a resposta não trouxer um JSON válido
+    """
+    result = extract_json(response_text(response))
+    if result is None:
+        return dict(UNKNOWN_INTENT)
+    result = normalize_intent(result)
+    result['fonte'] = 'llm'
+    return result
 
 class AIEngine:
     """Motor de IA usando Google Gemini"""
@@ -19,11 +130,77 @@ class AIEngine:
             api_key: Chave da API do Google Gemini
         """
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        self.chat_sessions = {}
+        # A instrução de vendas é fixa: vai uma vez no modelo, não em cada conversa
+        self.model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=sales_instruction())
+        self.analysis_model = genai.GenerativeModel('gemini-1.5-flash')
+        
+        session_settings = load_session_settings()
+        idle_minutes = session_settings['inatividade_minutos']
+        self.history_limit = session_settings['historico_maximo']
+        self.history_loader = None
+        self.chat_sessions = ChatSessionStore(
+            max_sessions=session_settings['max_sessoes'],
+            idle_seconds=idle_minutes * 60 if idle_minutes else None,
+            loader=self._rehydrate_session
+        )
+        
+        # Mensagens simples são classificadas localmente, sem chamar o modelo
+        self.intent_classifier = IntentClassifier()
+        # Mensagens repetidas reaproveitam a análise já feita pelo modelo
+        self.intent_cache = IntentCache.from_config()
+        
+        ai_settings = load_ai_settings()
+        self.combined_turns = ai_settings.get('turno_combinado', True)
+        
+        # Resposta e intenção em paralelo quando são chamadas separadas
+        parallel = dict(DEFAULT_PARALLEL_SETTINGS, **ai_settings.get('paralelo', {}))
+        self.intent_timeout = parallel['timeout_intencao_segundos']
+        self._executor = None
+        if parallel['ativo']:
+            self._executor = ThreadPoolExecutor(parallel['max_threads'], 'vendexa-ia')
+        
+        self._turn_lock = threading.Lock()
+        self._turn_counts = Counter()
+        self._turn_timings = defaultdict(Counter)
+        self._turn_samples = defaultdict(Counter)
+    
+    def set_history_loader(self, loader: Callable[[str, int], Optional[Tuple[Dict, List[Dict]]]]):
+        """Define a função que lê o histórico de uma conversa
+        
+        Usada para recriar sessões descartadas por inatividade ou perdidas
+        em um reinício.
+        
+        Args:
+            loader: Recebe o ID do lead e a quantidade máxima de trocas e
+                retorna as informações do lead e as trocas {mensagem,
+                resposta} da conversa em andamento, da mais antiga para a
+                mais recente, ou None se não há conversa em andamento
+        """
+        self.history_loader = loader
+    
+    def _rehydrate_session(self, lead_id: str):
+        """Recria a sessão de chat de um lead a partir do histórico gravado
+        
+        Args:
+            lead_id: ID do lead
+            
+        Returns:
+            Sessão de chat, ou None se não há conversa em andamento
+        """
+        if self.history_loader is None:
+            return None
+        loaded = self.history_loader(lead_id, self.history_limit)
+        if loaded is None:
+            return None
         
+        lead_info, turns = loaded
+        return self.model.start_chat(history=self._conversation_history(lead_info, turns))
+    
     def create_sales_prompt(self, lead_info: Dict) -> str:
-        """Cria um prompt personalizado para vendas
+        """Retorna o prompt completo de vendas de um lead
+        
+        É a instrução de sistema do modelo seguida do bloco do lead, que
+        abre o histórico de cada conversa.
         
         Args:
             lead_info: Informações do lead (nome, empresa, interesse, etc)
@@ -31,71 +208,26 @@ class AIEngine:
         Returns:
             Prompt formatado para o modelo
         """
-        prompt = f"""
-Você é um assistente de vendas inteligente da VENDEXA.
-
-**SOBRE A VENDEXA:**
-VENDEXA é um Sistema de Vendas Autônomo com IA que automatiza 100% do processo de vendas.
-
-**PLANOS E PREÇOS:**
-
-1. **Plano Starter - R$ 297/mês**
-   - Até 100 leads/mês
-   - 1.000 conversas/mês com IA
-   - Email marketing automatizado
-   - Suporte por email
-   - Ideal para: Pequenas empresas e startups
-
-2. **Plano Professional - R$ 697/mês** (MAIS POPULAR)
-   - Até 500 leads/mês
-   - 5.000 conversas/mês com IA
-   - Email + WhatsApp automatizado
-   - Suporte prioritário
-   - Relatórios avançados
-   - Ideal para: Médias empresas
-
-3. **Plano Enterprise - R$ 1.497/mês**
-   - Leads ILIMITADOS
-   - Conversas ILIMITADAS
-   - IA personalizada para seu negócio
-   - Todos os canais (Email, WhatsApp, SMS)
-   - Suporte 24/7 dedicado
-   - API dedicada
-   - Customizações sob medida
-   - Ideal para: Grandes empresas
-
-**BENEFÍCIOS:**
-- ✅ Automatize 100% das vendas
-- ✅ IA que vende 24 horas por dia, 7 dias por semana
-- ✅ Aumente conversões em até 300%
-- ✅ Reduza custos com equipe de vendas
-- ✅ Escale sem limites
-- ✅ ROI comprovado em 30 dias
-
-**SEU OBJETIVO:**
-1. Entender as necessidades do cliente
-2. Recomendar o plano ideal baseado no tamanho da empresa
-3. Destacar benefícios específicos para o negócio dele
-4. Responder objeções de forma profissional
-5. Conduzir ao fechamento da venda
-
-**Informações do Lead:**
-- Nome: {lead_info.get('nome', 'Cliente')}
-- Empresa: {lead_info.get('empresa', 'Não informado')}
-- Interesse: {lead_info.get('interesse', 'Automação de vendas')}
-- Orçamento: {lead_info.get('orcamento', 'A definir')}
-
-**IMPORTANTE:**
-- Seja profissional e cordial
-- Seja objetivo e claro
-- Seja persuasivo mas não insistente
-- Foque em agregar valor
-- Sempre mencione que temos teste grátis de 7 dias
-- Ao final, sempre ofereça agendar uma demonstração
-
-Responda em português do Brasil.
-"""
-        return prompt
+        return sales_instruction() + '\n' + lead_context(lead_info)
+    
+    def _conversation_history(self, lead_info: Dict, turns: Optional[List[Dict]] = None) -> List[Dict]:
+        """Monta o histórico de uma conversa
+        
+        Args:
+            lead_info: Informações do lead
+            turns: Trocas {mensagem, resposta} já realizadas
+            
+        Returns:
+            Contexto do lead e saudação, seguidos das trocas
+        """
+        history = [
+            {'role': 'user', 'parts': [lead_context(lead_info)]},
+            {'role': 'model', 'parts': [greeting(lead_info)]}
+        ]
+        for turn in turns or []:
+            history.append({'role': 'user', 'parts': [turn['mensagem'] or '']})
+            history.append({'role': 'model', 'parts': [turn['resposta'] or '']})
+        return history
     
     def start_conversation(self, lead_id: str, lead_info: Dict) -> str:
         """Inicia uma nova conversa com um lead
@@ -107,18 +239,10 @@ Responda em português do Brasil.
         Returns:
             Mensagem inicial de saudação
         """
-        system_prompt = self.create_sales_prompt(lead_info)
-        chat = self.model.start_chat(history=[])
-        self.chat_sessions[lead_id] = chat
+        chat = self.model.start_chat(history=self._conversation_history(lead_info))
+        self.chat_sessions.put(lead_id, chat)
         
-        # Mensagem inicial
-        initial_message = f"""Olá {lead_info.get('nome', 'Cliente')}! 👋
-
-Sou o assistente virtual da VENDEXA. Estou aqui para ajudá-lo a encontrar a melhor solução para suas necessidades.
-
-Como posso ajudá-lo hoje?"""
-        
-        return initial_message
+        return greeting(lead_info)
     
     def send_message(self, lead_id: str, message: str) -> str:
         """Envia uma mensagem e recebe resposta
@@ -130,56 +254,343 @@ Como posso ajudá-lo hoje?"""
         Returns:
             Resposta da IA
         """
-        if lead_id not in self.chat_sessions:
-            return "Erro: Sessão não encontrada. Inicie uma nova conversa."
+        chat = self.chat_sessions.get(lead_id)
+        if chat is None:
+            return SESSION_NOT_FOUND
         
-        chat = self.chat_sessions[lead_id]
         response = chat.send_message(message)
         return response.text
     
-    def analyze_intent(self, message: str) -> Dict:
-        """Analisa a intenção da mensagem do cliente
+    def chat_turn(self, lead_id: str, message: str) -> Dict:
+        """Responde a uma mensagem do cliente e analisa sua intenção
+        
+        Quando o classificador local ou o cache de análises resolve a
+        intenção, só a resposta é pedida ao modelo. Caso contrário, no modo combinado (ia.turno_combinado)
+        uma única chamada ao chat devolve resposta e análise; se ela falhar
+        ou vier fora do formato, o turno é refeito em duas chamadas
+        (resposta e analyze_intent), executadas em paralelo.
         
         Args:
+            lead_id: ID do lead
             message: Mensagem do cliente
             
         Returns:
-            Dicionário com análise de intenção
+            Resposta, análise de intenção, modo do turno (local, cache,
+            combinado ou duas_chamadas) e tempos da etapa em milissegundos
         """
-        prompt = f"""
-Analise a seguinte mensagem de um cliente e identifique:
-1. Intenção principal (interesse, dúvida, objeção, pronto_para_comprar, despedida)
-2. Nível de interesse (baixo, médio, alto)
-3. Sentimento (positivo, neutro, negativo)
-
-Mensagem: "{message}"
-
-Responda APENAS em formato JSON:
-{{
-    "intencao": "...",
-    "nivel_interesse": "...",
-    "sentimento": "...",
-    "resumo": "..."
-}}
-"""
+        started = time.perf_counter()
+        chat = self.chat_sessions.get(lead_id)
+        if chat is None:
+            return {'response': SESSION_NOT_FOUND, 'intent': self.analyze_intent(message),
+                    'mode': 'sem_sessao', 'timings': {}}
+        
+        timings = {}
+        intent, mode = self._known_intent(message)
+        if intent is not None:
+            reply_started = time.perf_counter()
+            response = chat.send_message(message).text
+            timings['resposta_ms'] = _elapsed_ms(reply_started)
+        else:
+            response = None
+            if self.combined_turns:
+                reply_started = time.perf_counter()
+                try:
+                    response, intent = self._combined_turn(chat, message)
+                    mode = 'combinado'
+                    timings['resposta_ms'] = _elapsed_ms(reply_started)
+                except Exception as e:
+                    print(f"Turno combinado indisponível, usando duas chamadas: {e}")
+                    self._count_event('combined_failures')
+            if response is None:
+                mode = 'duas_chamadas'
+                response, intent, call_timings = self._two_call_turn(chat, message)
+                timings.update(call_timings)
+            self._remember_intent(message, intent)
+        
+        timings['total_ms'] = _elapsed_ms(started)
+        self._record_turn(mode, timings)
+        return {'response': response, 'intent': intent, 'mode': mode, 'timings': timings}
+    
+    def stream_turn(self, lead_id: str, message: str) -> Iterator[Dict]:
+        """Responde a uma mensagem em partes, à medida que o modelo gera o texto
+        
+        A resposta é pedida com stream=True e cada parte é repassada assim
+        que chega. A intenção, quando não resolvida localmente ou pelo
+        cache, é analisada no pool de threads durante a geração e recolhida
+        ao final. Se a geração for interrompida (erro ou cliente
+        desconectado), o turno incompleto é desfeito no histórico do chat.
         
-        response = self.model.generate_content(prompt)
+        Args:
+            lead_id: ID do lead
+            message: Mensagem do cliente
+            
+        Yields:
+            {"type": "chunk", "text": ...} para cada parte e, ao final,
+            {"type": "done"} com resposta completa, análise de intenção,
+            modo (streaming ou sem_sessao) e tempos, incluindo
+            primeiro_token_ms
+        """
+        started = time.perf_counter()
+        chat = self.chat_sessions.get(lead_id)
+        if chat is None:
+            yield {'type': 'chunk', 'text': SESSION_NOT_FOUND}
+            yield {'type': 'done', 'response': SESSION_NOT_FOUND, 'intent': self.analyze_intent(message),
+                   'mode': 'sem_sessao', 'timings': {}}
+            return
+        
+        timings = {}
+        intent, _ = self._known_intent(message)
+        future = None
+        if intent is None and self._executor is not None:
+            future = self._executor.submit(self._timed_intent, message)
+        
+        parts = []
+        response = None
         try:
-            # Extrai JSON da resposta
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:-3].strip()
-            elif text.startswith('```'):
-                text = text[3:-3].strip()
-            return json.loads(text)
-        except:
+            response = chat.send_message(message, stream=True)
+            for chunk in response:
+                text = response_text(chunk)
+                if not text:
+                    continue
+                if not parts:
+                    timings['primeiro_token_ms'] = _elapsed_ms(started)
+                parts.append(text)
+                yield {'type': 'chunk', 'text': text}
+        except BaseException:
+            if future is not None:
+                future.cancel()
+            if response is not None and chat.last is response:
+                chat.rewind()
+            raise
+        timings['resposta_ms'] = _elapsed_ms(started)
+        
+        if intent is None:
+            if future is not None:
+                intent = self._await_intent(future, started, timings)
+            else:
+                intent, intent_seconds = self._timed_intent(message)
+                timings['intencao_ms'] = round(intent_seconds * 1000, 1)
+            self._remember_intent(message, intent)
+        
+        timings['total_ms'] = _elapsed_ms(started)
+        self._record_turn('streaming', timings)
+        yield {'type': 'done', 'response': ''.join(parts), 'intent': intent,
+               'mode': 'streaming', 'timings': timings}
+    
+    def _two_call_turn(self, chat, message: str) -> Tuple[str, Dict, Dict]:
+        """Pede a resposta e a análise de intenção em chamadas separadas
+        
+        A análise roda no pool de threads do motor enquanto a resposta é
+        gerada. Se não terminar em ia.paralelo.timeout_intencao_segundos
+        (contados desde o envio), o turno segue com intenção "desconhecida".
+        
+        Args:
+            chat: Sessão de chat
+            message: Mensagem do cliente
+            
+        Returns:
+            (resposta, análise de intenção, tempos em milissegundos)
+        """
+        timings = {}
+        if self._executor is None:
+            reply_started = time.perf_counter()
+            response = chat.send_message(message).text
+            timings['resposta_ms'] = _elapsed_ms(reply_started)
+            intent, intent_seconds = self._timed_intent(message)
+            timings['intencao_ms'] = round(intent_seconds * 1000, 1)
+            return response, intent, timings
+        
+        submitted = time.perf_counter()
+        future = self._executor.submit(self._timed_intent, message)
+        try:
+            response = chat.send_message(message).text
+        except Exception:
+            future.cancel()
+            raise
+        timings['resposta_ms'] = _elapsed_ms(submitted)
+        
+        intent = self._await_intent(future, submitted, timings)
+        return response, intent, timings
+    
+    def _await_intent(self, future, submitted: float, timings: Dict) -> Dict:
+        """Aguarda a análise de intenção submetida ao pool
+        
+        Args:
+            future: Execução de _timed_intent no pool
+            submitted: Momento do envio (time.perf_counter); o tempo limite
+                é contado a partir dele
+            timings: Tempos do turno, completados com intencao_ms e
+                espera_intencao_ms
+                
+        Returns:
+            Análise de intenção ("desconhecida" com fonte timeout ou erro
+            se não concluída)
+        """
+        waiting = time.perf_counter()
+        remaining = self.intent_timeout - (waiting - submitted)
+        try:
+            intent, intent_seconds = future.result(timeout=max(0.0, remaining))
+            timings['intencao_ms'] = round(intent_seconds * 1000, 1)
+        except FutureTimeoutError:
+            self._count_event('intent_timeouts')
+            intent = dict(UNKNOWN_INTENT, resumo='Análise não concluída no tempo limite', fonte='timeout')
+        except Exception as e:
+            print(f"Erro na análise de intenção: {e}")
+            self._count_event('intent_errors')
+            intent = dict(UNKNOWN_INTENT, fonte='erro')
+        timings['espera_intencao_ms'] = _elapsed_ms(waiting)
+        return intent
+    
+    def _timed_intent(self, message: str) -> Tuple[Dict, float]:
+        """Executa a análise de intenção pelo modelo, medindo a duração"""
+        started = time.perf_counter()
+        intent = self._analyze_intent_llm(message)
+        return intent, time.perf_counter() - started
+    
+    def _combined_turn(self, chat, message: str) -> Tuple[str, Dict]:
+        """Pede ao chat a resposta e a análise em uma única chamada
+        
+        No histórico do chat, o JSON devolvido é trocado pelo texto da
+        resposta, o mesmo formato das sessões recriadas a partir do banco.
+        
+        Args:
+            chat: Sessão de chat
+            message: Mensagem do cliente
+            
+        Returns:
+            (resposta, análise de intenção)
+            
+        Raises:
+            ValueError: Resposta fora do formato (o turno é desfeito no histórico)
+        """
+        started = time.perf_counter()
+        response = chat.send_message(message, generation_config=COMBINED_TURN_CONFIG)
+        reply, intent = self._parse_combined_turn(chat, response)
+        self.intent_classifier.record_llm_call(time.perf_counter() - started)
+        return reply, intent
+    
+    def _parse_combined_turn(self, chat, response) -> Tuple[str, Dict]:
+        """Separa resposta e análise de um turno combinado
+        
+        Args:
+            chat: Sessão de chat que recebeu o turno
+            response: Resposta do modelo
+            
+        Returns:
+            (resposta, análise de intenção)
+            
+        Raises:
+            ValueError: Resposta fora do formato (o turno é desfeito no histórico)
+        """
+        data = extract_json(response_text(response))
+        reply = data.get('resposta') if data else None
+        if not isinstance(reply, str) or not reply.strip():
+            chat.rewind()
+            raise ValueError('resposta fora do formato JSON esperado')
+        
+        chat.history[-1].parts[0].text = reply
+        intent = dict(UNKNOWN_INTENT, resumo='')
+        intent.update(normalize_intent({field: data.get(field) for field in INTENT_FIELDS if data.get(field)}))
+        intent['resumo'] = data.get('resumo') or ''
+        return reply, intent
+    
+    def _record_turn(self, mode: str, timings: Dict):
+        """Contabiliza um turno de conversa e seus tempos"""
+        with self._turn_lock:
+            self._turn_counts[mode] += 1
+            self._turn_timings[mode].update(timings)
+            self._turn_samples[mode].update(timings.keys())
+    
+    def _count_event(self, name: str):
+        """Contabiliza uma falha ou tempo esgotado"""
+        with self._turn_lock:
+            self._turn_counts[name] += 1
+    
+    def turn_stats(self) -> Dict:
+        """Retorna os contadores dos turnos de conversa
+        
+        Returns:
+            Turnos e tempos médios por modo (resposta, intenção, espera
+            pela intenção após a resposta e total), falhas do modo
+            combinado e análises de intenção esgotadas ou com erro
+        """
+        events = ('combined_failures', 'intent_timeouts', 'intent_errors')
+        with self._turn_lock:
+            turns = {mode: count for mode, count in self._turn_counts.items() if mode not in events}
             return {
-                "intencao": "desconhecida",
-                "nivel_interesse": "medio",
-                "sentimento": "neutro",
-                "resumo": "Não foi possível analisar"
+                'turns': turns,
+                'avg_ms': {
+                    mode: {
+                        name: round(total / self._turn_samples[mode][name], 1)
+                        for name, total in self._turn_timings[mode].items()
+                    }
+                    for mode in turns
+                },
+                **{event: self._turn_counts[event] for event in events},
+                'combined_enabled': self.combined_turns,
+                'parallel_enabled': self._executor is not None,
+                'intent_timeout_seconds': self.intent_timeout
             }
     
+    def analyze_intent(self, message: str) -> Dict:
+        """Analisa a intenção da mensagem do cliente
+        
+        O classificador local responde quando tem confiança suficiente, e
+        mensagens já analisadas (mesmo texto normalizado) saem do cache; as
+        demais vão para o modelo. O campo "fonte" indica quem classificou
+        (regras, bayes, cache ou llm).
+        
+        Args:
+            message: Mensagem do cliente
+            
+        Returns:
+            Dicionário com análise de intenção
+        """
+        known, _ = self._known_intent(message)
+        if known is not None:
+            return known
+        intent = self._analyze_intent_llm(message)
+        self._remember_intent(message, intent)
+        return intent
+    
+    def _known_intent(self, message: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Resolve a intenção sem chamar o modelo
+        
+        Args:
+            message: Mensagem do cliente
+            
+        Returns:
+            (análise, "local" ou "cache"), ou (None, None) se o modelo
+            precisa analisar a mensagem
+        """
+        intent = self.intent_classifier.classify(message)
+        if intent is not None:
+            return intent, 'local'
+        if self.intent_cache is not None:
+            intent = self.intent_cache.get(message)
+            if intent is not None:
+                return intent, 'cache'
+        return None, None
+    
+    def _remember_intent(self, message: str, intent: Dict):
+        """Guarda no cache uma análise feita pelo modelo"""
+        if self.intent_cache is not None and intent.get('fonte') == 'llm':
+            self.intent_cache.set(message, intent)
+    
+    def _analyze_intent_llm(self, message: str) -> Dict:
+        """Analisa a intenção da mensagem com o modelo
+        
+        Args:
+            message: Mensagem do cliente
+            
+        Returns:
+            Dicionário com análise de intenção
+        """
+        started = time.perf_counter()
+        response = self.analysis_model.generate_content(intent_prompt(message))
+        self.intent_classifier.record_llm_call(time.perf_counter() - started)
+        return parse_intent_response(response)
+    
     def generate_proposal(self, lead_info: Dict, requirements: str) -> str:
         """Gera uma proposta comercial personalizada
         
@@ -190,27 +601,7 @@ Responda APENAS em formato JSON:
         Returns:
             Proposta formatada
         """
-        prompt = f"""
-Crie uma proposta comercial profissional baseada nas seguintes informações:
-
-Cliente: {lead_info.get('nome', 'Cliente')}
-Empresa: {lead_info.get('empresa', 'Não informado')}
-Requisitos: {requirements}
-Orçamento: {lead_info.get('orcamento', 'A definir')}
-
-A proposta deve incluir:
-1. Saudação personalizada
-2. Resumo das necessidades identificadas
-3. Solução proposta
-4. Benefícios principais
-5. Investimento
-6. Próximos passos
-7. Chamada para ação
-
-Formate de forma profissional e persuasiva.
-"""
-        
-        response = self.model.generate_content(prompt)
+        response = self.model.generate_content(proposal_prompt(lead_info, requirements))
         return response.text
     
     def close_conversation(self, lead_id: str):
@@ -219,8 +610,7 @@ Formate de forma profissional e persuasiva.
         Args:
             lead_id: ID do lead
         """
-        if lead_id in self.chat_sessions:
-            del self.chat_sessions[lead_id]
+        self.chat_sessions.discard(lead_id)
 
 if __name__ == "__main__":
     # Teste básico
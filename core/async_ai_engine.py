@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Motor de IA Assíncrono
+Variante asyncio do motor de IA, com limite global de chamadas simultâneas ao modelo
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, Optional, Tuple
+
+from core.ai_engine import (
+    AIEngine, COMBINED_TURN_CONFIG, SESSION_NOT_FOUND, UNKNOWN_INTENT,
+    _elapsed_ms, load_ai_settings, parse_intent_response
+)
+from core.prompts import intent_prompt, proposal_prompt
+
+DEFAULT_ASYNC_SETTINGS = {
+    'max_em_andamento': 64
+}
+
+
+class FairLimiter:
+    """Semáforo com fila justa entre chaves
+    
+    Limita as chamadas em andamento a `limit`. Quem chega com o limite
+    atingido entra na fila da sua chave (o lead); ao liberar uma vaga, as
+    filas são atendidas em rodízio, na ordem de chegada dentro de cada
+    chave. Um lead com muitas mensagens pendentes não atrasa os demais.
+    
+    Deve ser usado em um único loop de eventos.
+    """
+    
+    def __init__(self, limit: int):
+        """Inicializa o limitador
+        
+        Args:
+            limit: Quantidade máxima de chamadas em andamento
+        """
+        if limit < 1:
+            raise ValueError('o limite deve ser maior que zero')
+        self.limit = limit
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._queues = OrderedDict()
+        self._waiting = 0
+        
+        self.acquired = 0
+        self.queued = 0
+        self.cancelled = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+    
+    async def acquire(self, key: Hashable = None):
+        """Aguarda uma vaga
+        
+        Args:
+            key: Chave da fila (ID do lead; None agrupa as chamadas sem lead)
+        """
+        started = time.perf_counter()
+        if self.in_flight < self.limit and not self._waiting:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._queues.setdefault(key, deque()).append(future)
+            self._waiting += 1
+            self.queued += 1
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # A vaga já tinha sido repassada: devolve para o próximo
+                    self.release()
+                else:
+                    self._remove(key, future)
+                self.cancelled += 1
+                raise
+        
+        waited = time.perf_counter() - started
+        self.acquired += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+    
+    def release(self):
+        """Libera uma vaga, repassando-a à próxima fila do rodízio"""
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self._waiting -= 1
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not future.done():
+                # A vaga passa direto para quem esperava; in_flight não muda
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+    
+    def _remove(self, key: Hashable, future: asyncio.Future):
+        """Tira da fila um pedido cancelado antes de receber a vaga"""
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+        self._waiting -= 1
+        if not queue:
+            del self._queues[key]
+    
+    @asynccontextmanager
+    async def slot(self, key: Hashable = None):
+        """Ocupa uma vaga durante o bloco
+        
+        Args:
+            key: Chave da fila
+        """
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores do limitador
+        
+        Returns:
+            Limite, chamadas em andamento e na fila, pico, vagas concedidas,
+            quantas precisaram esperar e tempos de espera
+        """
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'waiting': self._waiting,
+            'waiting_keys': len(self._queues),
+            'peak_in_flight': self.peak_in_flight,
+            'acquired': self.acquired,
+            'queued': self.queued,
+            'cancelled': self.cancelled,
+            'avg_wait_ms': round(self.wait_seconds / self.acquired * 1000, 3) if self.acquired else 0.0,
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 3)
+        }
+
+
+class AsyncAIEngine:
+    """Motor de IA com chamadas assíncronas ao Gemini
+    
+    Envolve um AIEngine e usa as mesmas sessões, prompts, classificador
+    local e cache de análises; as chamadas ao modelo usam os métodos
+    assíncronos do cliente e passam pelo FairLimiter
+    (ia.assincrono.max_em_andamento), compartilhado por todas as conversas
+    do processo. Os métodos públicos são corrotinas; o que consulta o
+    banco (recriação de sessões, cache persistente) roda em uma thread
+    para não bloquear o loop de eventos.
+    """
+    
+    def __init__(self, engine: AIEngine, max_in_flight: Optional[int] = None):
+        """Inicializa o motor de IA assíncrono
+        
+        Args:
+            engine: Motor de IA síncrono cujas sessões e modelos são usados
+            max_in_flight: Limite de chamadas simultâneas ao modelo
+                (padrão: ia.assincrono.max_em_andamento)
+        """
+        self.engine = engine
+        settings = dict(DEFAULT_ASYNC_SETTINGS, **load_ai_settings().get('assincrono', {}))
+        self.limiter = FairLimiter(max_in_flight or settings['max_em_andamento'])
+    
+    @classmethod
+    def from_api_key(cls, api_key: str, max_in_flight: Optional[int] = None) -> 'AsyncAIEngine':
+        """Cria o motor assíncrono com um AIEngine próprio
+        
+        Args:
+            api_key: Chave da API do Google Gemini
+            max_in_flight: Limite de chamadas simultâneas ao modelo
+            
+        Returns:
+            AsyncAIEngine
+        """
+        return cls(AIEngine(api_key), max_in_flight)
+    
+    async def _get_session(self, lead_id: str):
+        """Retorna a sessão de chat de um lead
+        
+        A sessão em memória é lida direto; a recriação a partir do banco
+        roda em uma thread.
+        """
+        chat = self.engine.chat_sessions.get(lead_id, load=False)
+        if chat is not None:
+            return chat
+        return await asyncio.to_thread(self.engine.chat_sessions.get, lead_id)
+    
+    async def start_conversation(self, lead_id: str, lead_info: Dict) -> str:
+        """Inicia uma nova conversa com um lead
+        
+        Args:
+            lead_id: ID único do lead
+            lead_info: Informações do lead
+            
+        Returns:
+            Mensagem inicial de saudação
+        """
+        return await asyncio.to_thread(self.engine.start_conversation, lead_id, lead_info)
+    
+    async def close_conversation(self, lead_id: str):
+        """Encerra uma conversa
+        
+        Args:
+            lead_id: ID do lead
+        """
+        self.engine.close_conversation(lead_id)
+    
+    async def _send(self, chat, lead_id: str, message: str, **kwargs):
+        """Envia uma mensagem ao chat respeitando o limite global"""
+        async with self.limiter.slot(lead_id):
+            return await chat.send_message_async(message, **kwargs)
+    
+    async def send_message(self, lead_id: str, message: str) -> str:
+        """Envia uma mensagem e recebe resposta
+        
+        Args:
+            lead_id: ID do lead
+            message: Mensagem do cliente
+            
+        Returns:
+            Resposta da IA
+        """
+        chat = await self._get_session(lead_id)
+        if chat is None:
+            return SESSION_NOT_FOUND
+        
+        response = await self._send(chat, lead_id, message)
+        return response.text
+    
+    async def chat_turn(self, lead_id: str, message: str) -> Dict:
+        """Responde a uma mensagem do cliente e analisa sua intenção
+        
+        Mesmo fluxo de AIEngine.chat_turn; no modo de duas chamadas a
+        análise roda como tarefa do loop e é cancelada se passar do tempo
+        limite.
+        
+        Args:
+            lead_id: ID do lead
+            message: Mensagem do cliente
+            
+        Returns:
+            Resposta, análise de intenção, modo do turno e tempos da etapa
+            em milissegundos
+        """
+        engine = self.engine
+        started = time.perf_counter()
+        chat = await self._get_session(lead_id)
+        if chat is None:
+            return {'response': SESSION_NOT_FOUND, 'intent': await self.analyze_intent(message, lead_id),
+                    'mode': 'sem_sessao', 'timings': {}}
+        
+        timings = {}
+        intent, mode = await self._known_intent(message)
+        if intent is not None:
+            reply_started = time.perf_counter()
+            response = (await self._send(chat, lead_id, message)).text
+            timings['resposta_ms'] = _elapsed_ms(reply_started)
+        else:
+            response = None
+            if engine.combined_turns:
+                reply_started = time.perf_counter()
+                try:
+                    response, intent = await self._combined_turn(chat, lead_id, message)
+                    mode = 'combinado'
+                    timings['resposta_ms'] = _elapsed_ms(reply_started)
+                except Exception as e:
+                    print(f"Turno combinado indisponível, usando duas chamadas: {e}")
+                    engine._count_event('combined_failures')
+            if response is None:
+                mode = 'duas_chamadas'
+                response, intent, call_timings = await self._two_call_turn(chat, lead_id, message)
+                timings.update(call_timings)
+            await self._remember_intent(message, intent)
+        
+        timings['total_ms'] = _elapsed_ms(started)
+        engine._record_turn(mode, timings)
+        return {'response': response, 'intent': intent, 'mode': mode, 'timings': timings}
+    
+    async def _combined_turn(self, chat, lead_id: str, message: str) -> Tuple[str, Dict]:
+        """Pede ao chat a resposta e a análise em uma única chamada"""
+        started = time.perf_counter()
+        response = await self._send(chat, lead_id, message, generation_config=COMBINED_TURN_CONFIG)
+        reply, intent = self.engine._parse_combined_turn(chat, response)
+        self.engine.intent_classifier.record_llm_call(time.perf_counter() - started)
+        return reply, intent
+    
+    async def _two_call_turn(self, chat, lead_id: str, message: str) -> Tuple[str, Dict, Dict]:
+        """Pede a resposta e a análise de intenção em chamadas separadas
+        
+        Args:
+            chat: Sessão de chat
+            lead_id: ID do lead
+            message: Mensagem do cliente
+            
+        Returns:
+            (resposta, análise de intenção, tempos em milissegundos)
+        """
+        engine = self.engine
+        timings = {}
+        if engine._executor is None:
+            # ia.paralelo desativado: chamadas em sequência
+            reply_started = time.perf_counter()
+            response = (await self._send(chat, lead_id, message)).text
+            timings['resposta_ms'] = _elapsed_ms(reply_started)
+            intent_started = time.perf_counter()
+            intent = await self._analyze_intent_llm(message, lead_id)
+            timings['intencao_ms'] = _elapsed_ms(intent_started)
+            return response, intent, timings
+        
+        submitted = time.perf_counter()
+        task = asyncio.ensure_future(self._timed_intent(message, lead_id))
+        try:
+            response = (await self._send(chat, lead_id, message)).text
+        except BaseException:
+            task.cancel()
+            raise
+        timings['resposta_ms'] = _elapsed_ms(submitted)
+        
+        waiting = time.perf_counter()
+        remaining = engine.intent_timeout - (waiting - submitted)
+        try:
+            intent, intent_seconds = await asyncio.wait_for(task, max(0.0, remaining))
+            timings['intencao_ms'] = round(intent_seconds * 1000, 1)
+        except asyncio.TimeoutError:
+            # wait_for cancela a tarefa, liberando a vaga no limitador
+            engine._count_event('intent_timeouts')
+            intent = dict(UNKNOWN_INTENT, resumo='Análise não concluída no tempo limite', fonte='timeout')
+        except Exception as e:
+            print(f"Erro na análise de intenção: {e}")
+            engine._count_event('intent_errors')
+            intent = dict(UNKNOWN_INTENT, fonte='erro')
+        timings['espera_intencao_ms'] = _elapsed_ms(waiting)
+        return response, intent, timings
+    
+    async def _timed_intent(self, message: str, lead_id: Optional[str]) -> Tuple[Dict, float]:
+        """Executa a análise de intenção pelo modelo, medindo a duração"""
+        started = time.perf_counter()
+        intent = await self._analyze_intent_llm(message, lead_id)
+        return intent, time.perf_counter() - started
+    
+    async def analyze_intent(self, message: str, lead_id: Optional[str] = None) -> Dict:
+        """Analisa a intenção da mensagem do cliente
+        
+        Args:
+            message: Mensagem do cliente
+            lead_id: ID do lead, usado como chave da fila no limitador
+            
+        Returns:
+            Dicionário com análise de intenção
+        """
+        known, _ = await self._known_intent(message)
+        if known is not None:
+            return known
+        intent = await self._analyze_intent_llm(message, lead_id)
+        await self._remember_intent(message, intent)
+        return intent
+    
+    def _cache_in_db(self) -> bool:
+        """Indica se o cache de análises consulta o banco compartilhado"""
+        cache = self.engine.intent_cache
+        return cache is not None and cache.persistent
+    
+    async def _known_intent(self, message: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Resolve a intenção sem chamar o modelo (cache em SQLite lido em uma thread)"""
+        if not self._cache_in_db():
+            return self.engine._known_intent(message)
+        return await asyncio.to_thread(self.engine._known_intent, message)
+    
+    async def _remember_intent(self, message: str, intent: Dict):
+        """Guarda no cache uma análise feita pelo modelo"""
+        if not self._cache_in_db():
+            self.engine._remember_intent(message, intent)
+        else:
+            await asyncio.to_thread(self.engine._remember_intent, message, intent)
+    
+    async def _analyze_intent_llm(self, message: str, lead_id: Optional[str] = None) -> Dict:
+        """Analisa a intenção da mensagem com o modelo"""
+        async with self.limiter.slot(lead_id):
+            started = time.perf_counter()
+            response = await self.engine.analysis_model.generate_content_async(intent_prompt(message))
+            self.engine.intent_classifier.record_llm_call(time.perf_counter() - started)
+        return parse_intent_response(response)
+    
+    async def generate_proposal(self, lead_info: Dict, requirements: str) -> str:
+        """Gera uma proposta comercial personalizada
+        
+        Args:
+            lead_info: Informações do lead
+            requirements: Requisitos identificados
+            
+        Returns:
+            Proposta formatada
+        """
+        async with self.limiter.slot(lead_info.get('id')):
+            response = await self.engine.model.generate_content_async(proposal_prompt(lead_info, requirements))
+        return response.text
+    
+    def turn_stats(self) -> Dict:
+        """Retorna os contadores dos turnos de conversa do motor envolvido"""
+        return self.engine.turn_stats()
+    
+    def limiter_stats(self) -> Dict:
+        """Retorna os contadores do limitador de chamadas"""
+        return self.limiter.stats()
+
+
+if __name__ == "__main__":
+    print("Motor de IA assíncrono VENDEXA inicializado com sucesso!")
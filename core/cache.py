@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Cache em Memória
+Cache LRU com tempo de expiração e contadores de acerto
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+
+def load_cache_settings(section: str, defaults: Dict, config_path: str = CONFIG_PATH) -> Dict:
+    """Carrega as configurações de um cache a partir do config.json
+    
+    Args:
+        section: Nome do cache dentro da seção "cache"
+        defaults: Valores padrão
+        config_path: Caminho do arquivo de configuração
+        
+    Returns:
+        Configurações do cache
+    """
+    settings = dict(defaults)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f).get('cache', {}).get(section, {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+class LRUCache:
+    """Cache LRU limitado por quantidade de itens e por idade"""
+    
+    def __init__(self, max_items: int = 1024, ttl: Optional[float] = None):
+        """Inicializa o cache
+        
+        Args:
+            max_items: Quantidade máxima de itens
+            ttl: Tempo de vida de cada item em segundos (None = sem expiração)
+        """
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+    
+    def generation(self) -> int:
+        """Retorna o contador de invalidações
+        
+        Capturado antes de uma leitura no banco e repassado a set(), evita
+        armazenar um valor lido antes de uma invalidação concorrente.
+        
+        Returns:
+            Número de invalidações já feitas
+        """
+        return self._generation
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Busca um item, contando acerto ou falha
+        
+        Args:
+            key: Chave do item
+            
+        Returns:
+            Valor armazenado ou None se ausente/expirado
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None, ttl: Optional[float] = None):
+        """Armazena um item, descartando o menos usado se necessário
+        
+        Args:
+            key: Chave do item
+            value: Valor a armazenar
+            generation: Valor de generation() antes da leitura; se houve
+                invalidação desde então, o item não é armazenado
+            ttl: Tempo de vida deste item (padrão: o do cache)
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: Hashable):
+        """Remove um item do cache
+        
+        Args:
+            key: Chave do item
+        """
+        with self._lock:
+            self._generation += 1
+            if self._items.pop(key, None) is not None:
+                self.invalidations += 1
+    
+    def clear(self):
+        """Remove todos os itens do cache"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._items)
+            self._items.clear()
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores do cache
+        
+        Returns:
+            Acertos, falhas, descartes, invalidações, tamanho e taxa de acerto
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._items),
+                'max_items': self.max_items,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+if __name__ == "__main__":
+    print("Cache VENDEXA inicializado com sucesso!")
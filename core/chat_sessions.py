@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Sessões de Chat
+Guarda as sessões de chat da IA com limite de tamanho e de inatividade
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+DEFAULT_SESSION_SETTINGS = {
+    'max_sessoes': 1000,
+    'inatividade_minutos': 30,
+    'historico_maximo': 20
+}
+
+
+def load_session_settings(config_path: str = CONFIG_PATH) -> Dict:
+    """Carrega as configurações das sessões a partir do config.json
+    
+    Args:
+        config_path: Caminho do arquivo de configuração
+        
+    Returns:
+        Configurações da seção ia.sessoes, com valores padrão
+    """
+    settings = dict(DEFAULT_SESSION_SETTINGS)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f).get('ia', {}).get('sessoes', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+class ChatSessionStore:
+    """Sessões de chat em ordem de uso, limitadas por quantidade e inatividade
+    
+    Uma sessão ausente (descartada ou perdida em um reinício) é recriada
+    sob demanda pela função `loader`, a partir do histórico gravado.
+    """
+    
+    def __init__(self, max_sessions: int = 1000, idle_seconds: Optional[float] = 1800,
+                 loader: Optional[Callable[[Hashable], Any]] = None):
+        """Inicializa o armazenamento
+        
+        Args:
+            max_sessions: Quantidade máxima de sessões em memória
+            idle_seconds: Tempo sem uso após o qual a sessão é descartada
+                (None = sem limite)
+            loader: Função que recria a sessão de um lead, ou retorna None
+                se o lead não tem conversa em andamento
+        """
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.loader = loader
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rehydrations = 0
+        self.rehydration_failures = 0
+        self.rehydration_seconds = 0.0
+    
+    def _expire(self, now: float):
+        """Descarta as sessões inativas (chamado com o lock adquirido)
+        
+        As sessões estão em ordem de último uso, então as inativas ficam
+        no início e a varredura para na primeira sessão ainda válida.
+        """
+        if not self.idle_seconds:
+            return
+        while self._sessions:
+            key, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used < self.idle_seconds:
+                break
+            del self._sessions[key]
+            self.expirations += 1
+    
+    def get(self, key: Hashable, load: bool = True) -> Optional[Any]:
+        """Retorna a sessão de um lead, recriando-a se necessário
+        
+        Args:
+            key: ID do lead
+            load: Se False, só consulta a memória, sem chamar o `loader`
+            
+        Returns:
+            Sessão de chat, ou None se não há conversa para o lead
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            item = self._sessions.get(key)
+            if item is not None:
+                self._sessions[key] = (item[0], now)
+                self._sessions.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            if not load:
+                return None
+            self.misses += 1
+        
+        if self.loader is None:
+            return None
+        
+        # A recriação consulta o banco; é feita fora do lock
+        started = time.perf_counter()
+        try:
+            session = self.loader(key)
+        except Exception as e:
+            print(f"Erro ao recriar sessão de chat {key}: {e}")
+            session = None
+        elapsed = time.perf_counter() - started
+        
+        with self._lock:
+            self.rehydration_seconds += elapsed
+            if session is None:
+                self.rehydration_failures += 1
+                return None
+            self.rehydrations += 1
+            # Outra thread pode ter recriado a mesma sessão enquanto isso
+            existing = self._sessions.get(key)
+            if existing is not None:
+                return existing[0]
+        self.put(key, session)
+        return session
+    
+    def put(self, key: Hashable, session: Any):
+        """Armazena a sessão de um lead, descartando a menos usada se necessário
+        
+        Args:
+            key: ID do lead
+            session: Sessão de chat
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[key] = (session, now)
+            self._sessions.move_to_end(key)
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+    
+    def discard(self, key: Hashable):
+        """Remove a sessão de um lead
+        
+        Args:
+            key: ID do lead
+        """
+        with self._lock:
+            self._sessions.pop(key, None)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._sessions
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores das sessões
+        
+        Returns:
+            Tamanho, acertos, falhas, descartes por limite e por
+            inatividade, recriações e tempo médio de recriação
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            attempts = self.rehydrations + self.rehydration_failures
+            return {
+                'size': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_seconds': self.idle_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'rehydrations': self.rehydrations,
+                'rehydration_failures': self.rehydration_failures,
+                'avg_rehydration_ms': round(self.rehydration_seconds / attempts * 1000, 3) if attempts else 0.0
+            }
+
+
+if __name__ == "__main__":
+    print("Sessões de chat VENDEXA inicializadas com sucesso!")
@@ -4,10 +4,16 @@ VENDEXA - Gerenciador de Conversas
 Gerencia o fluxo de conversas com leads
 """
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 import json
 
+from core.intent_classifier import is_valid_intent
+
+# Mensagens registradas no início e no fim de uma conversa
+CONVERSATION_STARTED = 'Conversa iniciada'
+CONVERSATION_ENDED = 'Conversa encerrada'
+
 class ConversationManager:
     """Gerencia conversas com múltiplos leads"""
     
@@ -21,6 +27,51 @@ class ConversationManager:
         self.ai_engine = ai_engine
         self.prospector = prospector
         self.active_conversations = {}
+        
+        # Sessões descartadas ou perdidas são recriadas a partir das interações
+        self.ai_engine.set_history_loader(self.load_chat_history)
+    
+    def load_chat_history(self, lead_id: str, limit: int) -> Optional[Tuple[Dict, List[Dict]]]:
+        """Lê o lead e as trocas da sua conversa em andamento
+        
+        Args:
+            lead_id: ID do lead
+            limit: Quantidade máxima de trocas (as mais recentes)
+            
+        Returns:
+            (lead, trocas {mensagem, resposta} da mais antiga para a mais
+            recente), ou None se o lead não tem conversa em andamento
+        """
+        lead = self.prospector.get_lead(int(lead_id))
+        if not lead:
+            return None
+        
+        # Uma interação a mais para encontrar o início da conversa
+        interactions = self.prospector.get_chat_interactions(int(lead_id), limit + 1)
+        
+        turns = []
+        for interaction in interactions:
+            message = interaction['mensagem'] or ''
+            if message == CONVERSATION_STARTED:
+                return lead, turns[::-1]
+            if message.startswith(CONVERSATION_ENDED):
+                return None
+            turns.append(interaction)
+        
+        # Conversa mais longa que o limite: mantém as trocas mais recentes
+        if len(interactions) > limit:
+            return lead, turns[:limit][::-1]
+        return None
+    
+    def train_intent_classifier(self) -> Dict:
+        """Treina o classificador local com as mensagens já analisadas pelo modelo
+        
+        Returns:
+            Exemplos usados e se o naive Bayes está ativo
+        """
+        classifier = self.ai_engine.intent_classifier
+        examples = self.prospector.get_intent_examples(classifier.settings['exemplos_treino'])
+        return classifier.train(examples)
     
     def start_conversation(self, lead_id: int) -> str:
         """Inicia uma conversa com um lead
@@ -42,7 +93,7 @@ class ConversationManager:
         self.prospector.log_interaction(
             lead_id, 
             'chat', 
-            'Conversa iniciada', 
+            CONVERSATION_STARTED,
             initial_message
         )
         
@@ -66,18 +117,55 @@ class ConversationManager:
         Returns:
             Dicionário com resposta e análise
         """
-        # Analisa intenção
-        intent = self.ai_engine.analyze_intent(message)
+        # Gera resposta e analisa intenção (uma chamada ao modelo no modo combinado)
+        turn = self.ai_engine.chat_turn(str(lead_id), message)
+        return self._finish_turn(lead_id, message, turn)
+    
+    def stream_message(self, lead_id: int, message: str) -> Iterator[Dict]:
+        """Envia uma mensagem e repassa a resposta em partes
+        
+        A interação só é registrada (com score e status) depois que a
+        resposta termina, com o texto completo.
+        
+        Args:
+            lead_id: ID do lead
+            message: Mensagem do cliente
+            
+        Yields:
+            {"type": "chunk", "text": ...} para cada parte da resposta e,
+            ao final, {"type": "done"} com o mesmo conteúdo de send_message
+        """
+        turn = None
+        for event in self.ai_engine.stream_turn(str(lead_id), message):
+            if event['type'] == 'chunk':
+                yield event
+            else:
+                turn = event
         
-        # Gera resposta
-        response = self.ai_engine.send_message(str(lead_id), message)
+        yield dict(self._finish_turn(lead_id, message, turn), type='done')
+    
+    def _finish_turn(self, lead_id: int, message: str, turn: Dict) -> Dict:
+        """Registra um turno concluído e atualiza o lead
         
-        # Registra interação
-        self.prospector.log_interaction(
+        Args:
+            lead_id: ID do lead
+            message: Mensagem do cliente
+            turn: Resultado do motor de IA (response, intent, timings)
+            
+        Returns:
+            Dicionário com resposta e análise
+        """
+        response = turn['response']
+        intent = turn['intent']
+        
+        # Registra interação (o score é recalculado na mesma transação). Só a
+        # análise do modelo é gravada: ela treina o classificador local
+        score = self.prospector.log_interaction(
             lead_id,
             'chat',
             message,
-            response
+            response,
+            intent if intent.get('fonte') == 'llm' and is_valid_intent(intent) else None
         )
         
         # Atualiza contador de mensagens
@@ -88,14 +176,12 @@ class ConversationManager:
         if intent.get('intencao') == 'pronto_para_comprar':
             self.prospector.update_lead_status(lead_id, 'qualificado')
         
-        # Recalcula score
-        score = self.prospector.calculate_lead_score(lead_id)
-        
         return {
             'response': response,
             'intent': intent,
             'score': score,
-            'should_send_proposal': intent.get('intencao') == 'pronto_para_comprar'
+            'should_send_proposal': intent.get('intencao') == 'pronto_para_comprar',
+            'timings': turn['timings']
         }
     
     def generate_and_send_proposal(self, lead_id: int, requirements: str) -> str:
@@ -143,7 +229,7 @@ class ConversationManager:
             self.prospector.log_interaction(
                 lead_id,
                 'chat',
-                f'Conversa encerrada: {reason}',
+                f'{CONVERSATION_ENDED}: {reason}',
                 f'Duração: {duration.total_seconds():.0f}s'
             )
             
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Cache de Análises de Intenção
+Análises do modelo reaproveitadas para mensagens repetidas, em memória e opcionalmente em SQLite
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from core.cache import LRUCache, load_cache_settings
+from core.intent_classifier import INTENT_FIELDS, is_valid_intent, normalize_message
+from database.connection import get_connection_manager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_INTENT_CACHE_SETTINGS = {
+    'ativo': True,
+    'max_itens': 5000,
+    'ttl_segundos': 3600,
+    'persistente': False,
+    'caminho': None,
+    'limpeza_a_cada': 1000
+}
+
+# Campos guardados de cada análise
+CACHED_FIELDS = tuple(INTENT_FIELDS) + ('resumo',)
+
+
+def load_intent_cache_settings() -> Dict:
+    """Carrega as configurações do cache (seção cache.intencoes do config.json)
+    
+    Returns:
+        Configurações com valores padrão e caminho do banco resolvido
+    """
+    settings = load_cache_settings('intencoes', DEFAULT_INTENT_CACHE_SETTINGS)
+    if not settings['caminho']:
+        settings['caminho'] = os.path.join(BASE_DIR, 'data', 'intent_cache.db')
+    return settings
+
+
+def message_key(message: str) -> Optional[str]:
+    """Chave de cache de uma mensagem
+    
+    A mensagem é normalizada (minúsculas, sem acentos, pontuação e espaços
+    repetidos) e resumida em SHA-1, de modo que "Qual o preço?" e
+    "qual o preco" compartilham a mesma análise.
+    
+    Args:
+        message: Mensagem do cliente
+        
+    Returns:
+        Hash hexadecimal, ou None para mensagens vazias
+    """
+    normalized = normalize_message(message)
+    if not normalized:
+        return None
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+class IntentCache:
+    """Cache de análises de intenção com tempo de vida
+    
+    A camada em memória é um LRUCache por processo. Com persistência
+    ativa, as análises também vão para uma tabela SQLite compartilhada
+    pelos workers; uma falha na memória consulta o banco antes do modelo.
+    """
+    
+    def __init__(self, max_items: int = 5000, ttl: float = 3600, db_path: Optional[str] = None,
+                 purge_every: int = 1000):
+        """Inicializa o cache
+        
+        Args:
+            max_items: Quantidade máxima de análises em memória
+            ttl: Tempo de vida de cada análise em segundos
+            db_path: Banco SQLite compartilhado (None = só memória)
+            purge_every: Gravações entre remoções das análises expiradas do banco
+        """
+        self.ttl = ttl
+        self.memory = LRUCache(max_items, ttl)
+        self.db_path = db_path
+        self.purge_every = purge_every
+        self._db = None
+        self._lock = threading.Lock()
+        
+        self.db_hits = 0
+        self.db_misses = 0
+        self.db_errors = 0
+        self.stores = 0
+        self.skipped = 0
+        
+        if db_path:
+            self._open()
+    
+    @classmethod
+    def from_config(cls) -> Optional['IntentCache']:
+        """Cria o cache a partir do config.json
+        
+        Returns:
+            IntentCache, ou None se o cache estiver desativado
+        """
+        settings = load_intent_cache_settings()
+        if not settings['ativo']:
+            return None
+        return cls(
+            max_items=settings['max_itens'],
+            ttl=settings['ttl_segundos'],
+            db_path=settings['caminho'] if settings['persistente'] else None,
+            purge_every=settings['limpeza_a_cada']
+        )
+    
+    def _open(self):
+        """Abre o banco compartilhado, criando a tabela se necessário"""
+        try:
+            manager = get_connection_manager(self.db_path)
+            with manager.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cache_intencoes (
+                        chave TEXT PRIMARY KEY,
+                        analise TEXT NOT NULL,
+                        expira_em REAL NOT NULL
+                    ) WITHOUT ROWID
+                ''')
+            self._db = manager
+        except (sqlite3.Error, OSError) as e:
+            print(f"Cache de intenções sem persistência: {e}")
+            self._db = None
+    
+    @property
+    def persistent(self) -> bool:
+        """Indica se as análises também são gravadas no banco compartilhado"""
+        return self._db is not None
+    
+    def get(self, message: str) -> Optional[Dict]:
+        """Busca a análise de uma mensagem
+        
+        Args:
+            message: Mensagem do cliente
+            
+        Returns:
+            Análise com fonte "cache", ou None se ausente ou expirada
+        """
+        key = message_key(message)
+        if key is None:
+            return None
+        
+        cached = self.memory.get(key)
+        if cached is None and self._db is not None:
+            cached = self._load(key)
+        if cached is None:
+            return None
+        return dict(cached, fonte='cache')
+    
+    def _load(self, key: str) -> Optional[Dict]:
+        """Busca uma análise no banco compartilhado e a copia para a memória"""
+        now = time.time()
+        try:
+            row = self._db.get_connection().execute(
+                'SELECT analise, expira_em FROM cache_intencoes WHERE chave = ? AND expira_em > ?',
+                (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Erro ao ler cache de intenções: {e}")
+            with self._lock:
+                self.db_errors += 1
+            return None
+        
+        with self._lock:
+            if row is None:
+                self.db_misses += 1
+                return None
+            self.db_hits += 1
+        analysis = json.loads(row['analise'])
+        self.memory.set(key, analysis, ttl=row['expira_em'] - now)
+        return analysis
+    
+    def set(self, message: str, intent: Dict):
+        """Guarda a análise feita pelo modelo para uma mensagem
+        
+        Análises incompletas (desconhecida, tempo esgotado, erro) não são
+        guardadas.
+        
+        Args:
+            message: Mensagem do cliente
+            intent: Análise de intenção
+        """
+        key = message_key(message)
+        if key is None or not is_valid_intent(intent):
+            with self._lock:
+                self.skipped += 1
+            return
+        
+        analysis = {field: intent.get(field) for field in CACHED_FIELDS}
+        self.memory.set(key, analysis)
+        with self._lock:
+            self.stores += 1
+            purge = self.purge_every and self.stores % self.purge_every == 0
+        if self._db is None:
+            return
+        
+        now = time.time()
+        try:
+            with self._db.transaction() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_intencoes (chave, analise, expira_em) VALUES (?, ?, ?)',
+                    (key, json.dumps(analysis, ensure_ascii=False), now + self.ttl)
+                )
+                if purge:
+                    conn.execute('DELETE FROM cache_intencoes WHERE expira_em <= ?', (now,))
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar cache de intenções: {e}")
+            with self._lock:
+                self.db_errors += 1
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores do cache
+        
+        Returns:
+            Contadores da memória, acertos e falhas no banco compartilhado,
+            análises guardadas e taxa de acerto geral (chamadas ao modelo
+            evitadas sobre consultas)
+        """
+        memory = self.memory.stats()
+        with self._lock:
+            lookups = memory['hits'] + memory['misses']
+            hits = memory['hits'] + self.db_hits
+            return {
+                'memory': memory,
+                'persistent': self.persistent,
+                'db_hits': self.db_hits,
+                'db_misses': self.db_misses,
+                'db_errors': self.db_errors,
+                'stores': self.stores,
+                'skipped': self.skipped,
+                'ttl_seconds': self.ttl,
+                'lookups': lookups,
+                'hits': hits,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+            }
+
+
+if __name__ == "__main__":
+    print("Cache de intenções VENDEXA inicializado com sucesso!")
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Classificador Local de Intenção
+Regras e naive Bayes que resolvem as mensagens simples sem chamar o modelo
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+DEFAULT_CLASSIFIER_SETTINGS = {
+    'ativo': True,
+    'confianca_minima': 0.85,
+    'cobertura_minima': 0.6,
+    'max_palavras_regras': 12,
+    'exemplos_minimos': 200,
+    'exemplos_treino': 5000,
+    'retreino_minutos': 60
+}
+
+# Valores aceitos em cada campo da análise
+INTENT_FIELDS = {
+    'intencao': ('interesse', 'duvida', 'objecao', 'pronto_para_comprar', 'despedida'),
+    'nivel_interesse': ('baixo', 'medio', 'alto'),
+    'sentimento': ('positivo', 'neutro', 'negativo')
+}
+
+NEGATION = re.compile(r'\b(nao|nem|nunca|jamais)\b')
+
+# (padrão sobre o texto normalizado, intencao, nivel_interesse, sentimento,
+#  resumo, ignorada em frases com negação)
+RULES = [
+    (r'\b(quero|vou|vamos|pode|posso|gostaria de) (assinar|contratar|comprar|fechar|aderir)\b'
+     r'|\b(manda|envia|me passa|mande|envie) o link\b'
+     r'|\bcomo (eu )?(faco para |posso )?(pagar|assinar|contratar)\b',
+     'pronto_para_comprar', 'alto', 'positivo', 'Cliente quer fechar a compra', True),
+    (r'\b(muito caro|ta caro|esta caro|caro demais|fora do (meu )?orcamento|sem orcamento'
+     r'|nao tenho (dinheiro|orcamento|verba)|vou pensar|preciso pensar|nao (estou|to) interessad[oa]'
+     r'|nao tenho interesse|nao preciso)\b',
+     'objecao', 'baixo', 'negativo', 'Cliente apresentou uma objeção', False),
+    (r'\b(quanto (custa|sai|fica|e)|qual (e )?o (preco|valor)|precos?|valores|mensalidade)\b',
+     'duvida', 'medio', 'neutro', 'Cliente perguntou sobre preços', False),
+    (r'\b(teste gratis|periodo de teste|trial|tem teste|gratuito|demonstracao|demo)\b',
+     'duvida', 'medio', 'neutro', 'Cliente perguntou sobre teste ou demonstração', False),
+    (r'\b(tchau|ate logo|ate mais|ate breve|adeus|falou)\b',
+     'despedida', 'baixo', 'neutro', 'Cliente se despediu', False),
+    (r'^(muito )?(obrigad[oa]|valeu|brigad[oa])( pela ajuda)?$',
+     'despedida', 'baixo', 'positivo', 'Cliente agradeceu', True),
+    (r'^(ok|okay|certo|entendi|beleza|blz|show|legal|perfeito|otimo|sim|claro)$',
+     'interesse', 'medio', 'neutro', 'Cliente confirmou', True)
+]
+COMPILED_RULES = [(re.compile(pattern), *result) for pattern, *result in RULES]
+
+
+def load_classifier_settings(config_path: str = CONFIG_PATH) -> Dict:
+    """Carrega as configurações do classificador a partir do config.json
+    
+    Args:
+        config_path: Caminho do arquivo de configuração
+        
+    Returns:
+        Configurações da seção ia.classificador, com valores padrão
+    """
+    settings = dict(DEFAULT_CLASSIFIER_SETTINGS)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f).get('ia', {}).get('classificador', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def normalize_message(text: str) -> str:
+    """Normaliza uma mensagem: minúsculas, sem acentos e pontuação, espaços simples
+    
+    Args:
+        text: Mensagem original
+        
+    Returns:
+        Texto normalizado
+    """
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
+
+def tokenize(normalized: str) -> List[str]:
+    """Palavras e pares de palavras de um texto normalizado"""
+    words = normalized.split()
+    return words + [f'{first}_{second}' for first, second in zip(words, words[1:])]
+
+
+def normalize_intent(intent: Dict) -> Dict:
+    """Normaliza os valores da análise ("médio" -> "medio", "objeção" -> "objecao")
+    
+    Args:
+        intent: Análise de intenção
+        
+    Returns:
+        Cópia da análise com os campos de INTENT_FIELDS normalizados
+    """
+    result = dict(intent)
+    for field in INTENT_FIELDS:
+        if isinstance(result.get(field), str):
+            result[field] = normalize_message(result[field]).replace(' ', '_')
+    return result
+
+
+def is_valid_intent(intent: Optional[Dict]) -> bool:
+    """Verifica se uma análise usa apenas valores conhecidos (serve como exemplo de treino)"""
+    return bool(intent) and all(intent.get(field) in values for field, values in INTENT_FIELDS.items())
+
+
+class NaiveBayes:
+    """Naive Bayes multinomial com suavização de Laplace"""
+    
+    def __init__(self, examples: Iterable[Tuple[List[str], str]], alpha: float = 1.0):
+        """Treina o modelo
+        
+        Args:
+            examples: Pares (tokens, rótulo)
+            alpha: Suavização
+        """
+        label_counts = Counter()
+        token_counts = defaultdict(Counter)
+        for tokens, label in examples:
+            label_counts[label] += 1
+            token_counts[label].update(tokens)
+        
+        self.vocabulary = set()
+        for counts in token_counts.values():
+            self.vocabulary.update(counts)
+        
+        total = sum(label_counts.values())
+        vocabulary_size = len(self.vocabulary) or 1
+        self.log_prior = {label: math.log(count / total) for label, count in label_counts.items()}
+        self.log_likelihood = {}
+        self.log_unseen = {}
+        for label in label_counts:
+            denominator = sum(token_counts[label].values()) + alpha * vocabulary_size
+            self.log_likelihood[label] = {
+                token: math.log((count + alpha) / denominator) for token, count in token_counts[label].items()
+            }
+            self.log_unseen[label] = math.log(alpha / denominator)
+    
+    def predict(self, tokens: List[str]) -> Tuple[Optional[str], float]:
+        """Retorna o rótulo mais provável e sua probabilidade
+        
+        Args:
+            tokens: Tokens da mensagem
+            
+        Returns:
+            (rótulo, probabilidade); (None, 0.0) se nenhum token é conhecido
+        """
+        known = [token for token in tokens if token in self.vocabulary]
+        if not known or not self.log_prior:
+            return None, 0.0
+        
+        scores = {
+            label: prior + sum(self.log_likelihood[label].get(token, self.log_unseen[label]) for token in known)
+            for label, prior in self.log_prior.items()
+        }
+        best = max(scores, key=scores.get)
+        # Softmax estável: probabilidade posterior do melhor rótulo
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+
+class IntentClassifier:
+    """Classifica mensagens localmente e indica quando é preciso chamar o modelo"""
+    
+    def __init__(self, settings: Optional[Dict] = None):
+        """Inicializa o classificador (as regras já valem; o naive Bayes depende de train)
+        
+        Args:
+            settings: Configurações (padrão: config.json)
+        """
+        self.settings = settings or load_classifier_settings()
+        self.enabled = self.settings['ativo']
+        self.min_confidence = self.settings['confianca_minima']
+        self._models = None
+        self._lock = threading.Lock()
+        
+        self.trained_examples = 0
+        self.trained_at = None
+        self.rule_hits = 0
+        self.bayes_hits = 0
+        self.fallbacks = 0
+        self.local_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+    
+    def train(self, examples: Iterable[Dict]) -> Dict:
+        """Treina o naive Bayes com mensagens já analisadas pelo modelo
+        
+        Com menos de exemplos_minimos exemplos válidos, apenas as regras
+        são usadas.
+        
+        Args:
+            examples: Dicionários com mensagem, intencao, nivel_interesse e sentimento
+            
+        Returns:
+            Exemplos usados e se o naive Bayes está ativo
+        """
+        tokenized = [
+            (tokenize(normalize_message(example['mensagem'])), example)
+            for example in examples if example.get('mensagem') and is_valid_intent(example)
+        ]
+        models = None
+        if len(tokenized) >= self.settings['exemplos_minimos']:
+            models = {
+                field: NaiveBayes((tokens, example[field]) for tokens, example in tokenized)
+                for field in INTENT_FIELDS
+            }
+        
+        with self._lock:
+            self._models = models
+            self.trained_examples = len(tokenized)
+            self.trained_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        return {'examples': len(tokenized), 'bayes': models is not None}
+    
+    def _match_rules(self, normalized: str) -> Optional[Dict]:
+        """Aplica as regras; mensagens longas ou com regras conflitantes ficam sem resultado"""
+        if len(normalized.split()) > self.settings['max_palavras_regras']:
+            return None
+        negated = NEGATION.search(normalized) is not None
+        
+        matches = [
+            rule for rule in COMPILED_RULES
+            if not (negated and rule[5]) and rule[0].search(normalized)
+        ]
+        if not matches or len({rule[1] for rule in matches}) > 1:
+            return None
+        _, intencao, nivel_interesse, sentimento, resumo, _ = matches[0]
+        return {
+            'intencao': intencao,
+            'nivel_interesse': nivel_interesse,
+            'sentimento': sentimento,
+            'resumo': resumo,
+            'fonte': 'regras',
+            'confianca': 1.0
+        }
+    
+    def _predict_bayes(self, normalized: str) -> Optional[Dict]:
+        """Aplica o naive Bayes
+        
+        O naive Bayes é confiante demais em mensagens com poucas palavras
+        conhecidas, então também exige que uma parte mínima das palavras
+        tenha aparecido no treino.
+        
+        Returns:
+            Análise, ou None se a cobertura ou a confiança de algum campo
+            ficar abaixo do mínimo
+        """
+        models = self._models
+        if models is None:
+            return None
+        
+        words = normalized.split()
+        vocabulary = models['intencao'].vocabulary
+        if not words or sum(word in vocabulary for word in words) / len(words) < self.settings['cobertura_minima']:
+            return None
+        
+        tokens = tokenize(normalized)
+        result = {'resumo': 'Classificação local', 'fonte': 'bayes'}
+        confidence = 1.0
+        for field, model in models.items():
+            label, probability = model.predict(tokens)
+            if label is None:
+                return None
+            result[field] = label
+            confidence = min(confidence, probability)
+        if confidence < self.min_confidence:
+            return None
+        result['confianca'] = round(confidence, 4)
+        return result
+    
+    def classify(self, message: str) -> Optional[Dict]:
+        """Classifica uma mensagem localmente
+        
+        Args:
+            message: Mensagem do cliente
+            
+        Returns:
+            Análise no formato de AIEngine.analyze_intent, ou None quando a
+            confiança é baixa e a mensagem deve ir para o modelo
+        """
+        if not self.enabled:
+            return None
+        
+        started = time.perf_counter()
+        normalized = normalize_message(message)
+        result = self._match_rules(normalized) or self._predict_bayes(normalized)
+        elapsed = time.perf_counter() - started
+        
+        with self._lock:
+            self.local_seconds += elapsed
+            if result is None:
+                self.fallbacks += 1
+            elif result['fonte'] == 'regras':
+                self.rule_hits += 1
+            else:
+                self.bayes_hits += 1
+        return result
+    
+    def record_llm_call(self, seconds: float):
+        """Registra a duração de uma análise feita pelo modelo
+        
+        Args:
+            seconds: Duração da chamada
+        """
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores do classificador
+        
+        A economia estimada é o número de acertos locais vezes a duração
+        média das chamadas ao modelo.
+        
+        Returns:
+            Acertos por fonte, taxa de acerto local, durações médias e economia
+        """
+        with self._lock:
+            local_hits = self.rule_hits + self.bayes_hits
+            classified = local_hits + self.fallbacks
+            avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                'enabled': self.enabled,
+                'trained_examples': self.trained_examples,
+                'trained_at': self.trained_at,
+                'bayes_active': self._models is not None,
+                'rule_hits': self.rule_hits,
+                'bayes_hits': self.bayes_hits,
+                'llm_fallbacks': self.fallbacks,
+                'hit_rate': round(local_hits / classified, 4) if classified else 0.0,
+                'avg_local_ms': round(self.local_seconds / classified * 1000, 3) if classified else 0.0,
+                'avg_llm_ms': round(avg_llm * 1000, 1),
+                'latency_saved_seconds': round(local_hits * avg_llm, 3)
+            }
+
+
+if __name__ == "__main__":
+    print("Classificador de intenção VENDEXA inicializado com sucesso!")
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Gravação Assíncrona de Interações
+Acumula interações em memória e grava em lote (group commit) em segundo plano
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger('VENDEXA')
+
+
+def intent_columns(intent: Optional[Dict]) -> tuple:
+    """Valores das colunas de intenção de uma interação
+    
+    Args:
+        intent: Análise de intenção (ou None)
+        
+    Returns:
+        (intencao, nivel_interesse, sentimento)
+    """
+    if not intent:
+        return None, None, None
+    return intent.get('intencao'), intent.get('nivel_interesse'), intent.get('sentimento')
+
+
+class InteractionWriter:
+    """Fila de interações gravada em lote por uma thread em segundo plano"""
+    
+    def __init__(self, prospector, batch_size: int = 200, interval_ms: int = 50,
+                 max_attempts: int = 5):
+        """Inicializa a fila e inicia a thread de gravação
+        
+        Args:
+            prospector: Prospector dono do banco, do score e do cache de leads
+            batch_size: Quantidade de interações que dispara uma gravação
+            interval_ms: Intervalo máximo entre gravações, em milissegundos
+            max_attempts: Falhas seguidas de uma partição antes de gravar suas
+                interações uma a uma e separar as que continuam falhando
+        """
+        self.prospector = prospector
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self.max_attempts = max_attempts
+        
+        self._pending = []
+        self._pending_by_lead = Counter()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._running = True
+        
+        self.flushes = 0
+        self.flushed_interactions = 0
+        self.errors = 0
+        # Falhas seguidas por partição
+        self._failures = Counter()
+        self.dead_lettered = 0
+        # Separadas que nem a tabela interacoes_falhas aceitou: (interação, erro)
+        self.dead_letters = []
+        
+        self._thread = threading.Thread(target=self._run, name='vendexa-interaction-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def enqueue(self, lead_id: int, tipo: str, mensagem: str, resposta: str = '',
+                intent: Optional[Dict] = None):
+        """Adiciona uma interação à fila
+        
+        Args:
+            lead_id: ID do lead
+            tipo: Tipo de interação
+            mensagem: Mensagem enviada
+            resposta: Resposta recebida
+            intent: Análise de intenção da mensagem, se houver
+        """
+        # Mesmo formato de CURRENT_TIMESTAMP, registrado no momento da interação
+        data = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._condition:
+            self._pending.append((lead_id, tipo, mensagem, resposta, data) + intent_columns(intent))
+            self._pending_by_lead[lead_id] += 1
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+    
+    def pending_count(self, lead_id: int) -> int:
+        """Retorna quantas interações do lead ainda não foram gravadas
+        
+        Args:
+            lead_id: ID do lead
+            
+        Returns:
+            Interações na fila ou em gravação
+        """
+        with self._condition:
+            return self._pending_by_lead.get(lead_id, 0)
+    
+    def flush(self) -> int:
+        """Grava imediatamente todas as interações da fila
+        
+        Ao retornar, tudo o que foi enfileirado antes da chamada está gravado
+        ou, após max_attempts falhas seguidas da partição, separado em
+        interacoes_falhas.
+        
+        Returns:
+            Quantidade de interações gravadas
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            
+            # Uma transação por partição; a ordem de cada lead é mantida
+            groups = {}
+            for interaction in batch:
+                groups.setdefault(self.prospector.shards.index_for_lead(interaction[0]), []).append(interaction)
+            groups = list(groups.items())
+            
+            separated = 0
+            for position, (index, interactions) in enumerate(groups):
+                manager = self.prospector.shards.managers[index]
+                try:
+                    self._write(manager, interactions)
+                    self._failures.pop(index, None)
+                    continue
+                except Exception as e:
+                    self.errors += 1
+                    self._failures[index] += 1
+                    attempts = self._failures[index]
+                    if attempts < self.max_attempts:
+                        logger.error(f"Erro ao gravar interações em lote (tentativa {attempts} de "
+                                     f"{self.max_attempts}): {e}")
+                        # Devolve à frente da fila o que não foi gravado; nada é descartado
+                        remaining = [item for _, items in groups[position:] for item in items]
+                        with self._condition:
+                            self._pending = remaining + self._pending
+                        self._mark_written([item for _, items in groups[:position] for item in items])
+                        raise
+                    logger.error(f"Erro ao gravar interações em lote após {attempts} tentativas, "
+                                 f"gravando uma a uma: {e}")
+                
+                # Tentativas esgotadas: uma linha com problema não bloqueia as demais
+                self._failures.pop(index, None)
+                separated += self._write_each(manager, interactions)
+            
+            self._mark_written(batch)
+            
+            self.flushes += 1
+            self.flushed_interactions += len(batch) - separated
+            return len(batch) - separated
+    
+    def _mark_written(self, interactions: List[tuple]):
+        """Desconta interações gravadas da contagem de pendentes por lead
+        
+        Args:
+            interactions: Interações gravadas
+        """
+        with self._condition:
+            self._pending_by_lead.subtract(lead_id for lead_id, *_ in interactions)
+            self._pending_by_lead += Counter()
+    
+    def _write(self, manager, batch: List[tuple]):
+        """Grava um lote em uma única transação
+        
+        Args:
+            manager: ConnectionManager da partição dos leads do lote
+            batch: Interações (lead_id, tipo, mensagem, resposta, data,
+                intencao, nivel_interesse, sentimento)
+        """
+        last_interaction = {}
+        for lead_id, _, _, _, data, *_ in batch:
+            last_interaction[lead_id] = data
+        
+        with manager.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO interacoes (lead_id, tipo, mensagem, resposta, data, intencao, nivel_interesse, sentimento)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+            conn.executemany(f'''
+                UPDATE leads
+                SET ultima_interacao = ?, score = {self.prospector.score_expression}
+                WHERE id = ?
+            ''', [(data, lead_id) for lead_id, data in last_interaction.items()])
+        
+        for lead_id in last_interaction:
+            self.prospector.lead_cache.invalidate(lead_id)
+    
+    def _write_each(self, manager, interactions: List[tuple]) -> int:
+        """Grava interações uma a uma, separando as que falham
+        
+        Args:
+            manager: ConnectionManager da partição
+            interactions: Interações do lote que falhou
+            
+        Returns:
+            Quantidade de interações separadas
+        """
+        failed = []
+        for interaction in interactions:
+            try:
+                self._write(manager, [interaction])
+            except Exception as e:
+                failed.append((interaction, str(e)))
+        if failed:
+            self._dead_letter(manager, failed)
+        return len(failed)
+    
+    def _dead_letter(self, manager, failed: List[Tuple[tuple, str]]):
+        """Guarda na tabela interacoes_falhas as interações que não puderam ser gravadas
+        
+        Se nem essa gravação for possível, elas ficam em dead_letters.
+        
+        Args:
+            manager: ConnectionManager da partição
+            failed: Pares (interação, mensagem de erro)
+        """
+        logger.error(f"{len(failed)} interações separadas em interacoes_falhas: {failed[0][1]}")
+        try:
+            with manager.transaction() as conn:
+                conn.executemany('''
+                    INSERT INTO interacoes_falhas
+                        (lead_id, tipo, mensagem, resposta, data, intencao, nivel_interesse, sentimento, erro)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [interaction + (error,) for interaction, error in failed])
+        except Exception as e:
+            logger.error(f"Erro ao gravar interacoes_falhas, {len(failed)} interações mantidas em memória: {e}")
+            with self._condition:
+                self.dead_letters.extend(failed)
+        self.dead_lettered += len(failed)
+    
+    def _run(self):
+        """Laço da thread de gravação"""
+        while True:
+            with self._condition:
+                if self._running and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.interval)
+                running = self._running
+            try:
+                self.flush()
+            except Exception:
+                # Nova tentativa no próximo ciclo
+                time.sleep(self.interval)
+            if not running:
+                return
+    
+    def close(self):
+        """Encerra a thread de gravação após gravar tudo o que está na fila"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores da fila
+        
+        Returns:
+            Tamanho da fila, gravações, interações gravadas, erros e
+            interações separadas (e quantas delas só estão em memória)
+        """
+        with self._condition:
+            queued = len(self._pending)
+            in_memory = len(self.dead_letters)
+        return {
+            'queued': queued,
+            'flushes': self.flushes,
+            'flushed_interactions': self.flushed_interactions,
+            'avg_batch_size': round(self.flushed_interactions / self.flushes, 1) if self.flushes else 0.0,
+            'errors': self.errors,
+            'dead_lettered': self.dead_lettered,
+            'dead_letters_in_memory': in_memory
+        }
+
+
+if __name__ == "__main__":
+    print("Gravação assíncrona de interações VENDEXA inicializada com sucesso!")
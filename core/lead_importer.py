@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Importação de Leads
+Lê listas de leads em CSV ou JSONL de forma incremental e grava em lote
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterator, TextIO
+
+LEAD_FIELDS = ('nome', 'email', 'telefone', 'empresa', 'cargo', 'interesse', 'orcamento', 'fonte')
+
+
+def _normalize_row(row: Dict) -> Dict:
+    """Padroniza as chaves de uma linha importada
+    
+    Args:
+        row: Linha lida do arquivo
+        
+    Returns:
+        Dicionário apenas com os campos conhecidos do lead
+    """
+    normalized = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    return {
+        field: str(normalized[field]).strip()
+        for field in LEAD_FIELDS
+        if normalized.get(field) not in (None, '')
+    }
+
+
+def iter_csv_leads(stream: TextIO) -> Iterator[Dict]:
+    """Lê leads de um CSV com cabeçalho, linha a linha
+    
+    Args:
+        stream: Arquivo texto aberto
+        
+    Yields:
+        Dados de cada lead
+    """
+    for row in csv.DictReader(stream):
+        yield _normalize_row(row)
+
+
+def iter_jsonl_leads(stream: TextIO) -> Iterator[Dict]:
+    """Lê leads de um arquivo JSONL (um objeto JSON por linha)
+    
+    Args:
+        stream: Arquivo texto aberto
+        
+    Yields:
+        Dados de cada lead
+    """
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield _normalize_row(json.loads(line))
+
+
+def iter_leads(stream: TextIO, file_format: str) -> Iterator[Dict]:
+    """Escolhe o leitor adequado ao formato
+    
+    Args:
+        stream: Arquivo texto aberto
+        file_format: 'csv' ou 'jsonl'
+        
+    Returns:
+        Iterador com os dados de cada lead
+    """
+    if file_format == 'csv':
+        return iter_csv_leads(stream)
+    if file_format in ('jsonl', 'ndjson'):
+        return iter_jsonl_leads(stream)
+    raise ValueError(f"Formato não suportado: {file_format}")
+
+
+def detect_format(filename: str) -> str:
+    """Identifica o formato pela extensão do arquivo
+    
+    Args:
+        filename: Nome do arquivo
+        
+    Returns:
+        'csv' ou 'jsonl'
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    return 'csv' if extension == '.csv' else 'jsonl'
+
+
+def import_leads_file(prospector, path: str, chunk_size: int = 1000, on_chunk=None) -> Dict:
+    """Importa um arquivo de leads usando Prospector.add_leads_bulk
+    
+    Args:
+        prospector: Instância do prospector
+        path: Caminho do arquivo CSV ou JSONL
+        chunk_size: Quantidade de leads por transação
+        on_chunk: Função chamada com as métricas de cada bloco
+        
+    Returns:
+        Resumo da importação
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return prospector.add_leads_bulk(iter_leads(f, detect_format(path)), chunk_size, on_chunk)
+
+
+def main():
+    """Importação via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.prospector import Prospector
+    
+    parser = argparse.ArgumentParser(description='Importa leads de um arquivo CSV ou JSONL')
+    parser.add_argument('arquivo', help='Arquivo .csv, .jsonl ou .ndjson')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados de destino')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Leads por transação')
+    args = parser.parse_args()
+    
+    def report(chunk):
+        print(f"Bloco {chunk['chunk']}: {chunk['rows']} linhas "
+              f"({chunk['inserted']} novos, {chunk['updated']} atualizados, {chunk['skipped']} ignorados) "
+              f"- {chunk['rows_per_second']} linhas/s")
+    
+    summary = import_leads_file(Prospector(args.db), args.arquivo, args.chunk_size, report)
+    print(f"\nTotal: {summary['rows']} linhas em {summary['seconds']}s "
+          f"({summary['rows_per_second']} linhas/s) - {summary['inserted']} novos, "
+          f"{summary['updated']} atualizados, {summary['skipped']} ignorados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Prompts de Vendas
+Instrução fixa do assistente (montada uma vez a partir dos planos) e contexto de cada lead
+"""
+
+from functools import lru_cache
+from typing import Dict, List
+
+from integrations.plans import PLANS, format_price
+
+BENEFITS = [
+    'Automatize 100% das vendas',
+    'IA que vende 24 horas por dia, 7 dias por semana',
+    'Aumente conversões em até 300%',
+    'Reduza custos com equipe de vendas',
+    'Escale sem limites',
+    'ROI comprovado em 30 dias'
+]
+
+GOALS = [
+    'Entender as necessidades do cliente',
+    'Recomendar o plano ideal baseado no tamanho da empresa',
+    'Destacar benefícios específicos para o negócio dele',
+    'Responder objeções de forma profissional',
+    'Conduzir ao fechamento da venda'
+]
+
+GUIDELINES = [
+    'Seja profissional e cordial',
+    'Seja objetivo e claro',
+    'Seja persuasivo mas não insistente',
+    'Foque em agregar valor',
+    'Sempre mencione que temos teste grátis de 7 dias',
+    'Ao final, sempre ofereça agendar uma demonstração'
+]
+
+
+def _plan_section(plans: Dict) -> str:
+    """Descreve os planos para o modelo
+    
+    Args:
+        plans: Catálogo de planos
+        
+    Returns:
+        Lista numerada de planos com preço, recursos e público ideal
+    """
+    blocks = []
+    for number, plan in enumerate(plans.values(), 1):
+        title = f"{number}. **Plano {plan['name']} - {format_price(plan)}**"
+        if plan.get('highlight'):
+            title += f" ({plan['highlight']})"
+        lines = [title] + [f"   - {feature}" for feature in plan['features']]
+        if plan.get('ideal_for'):
+            lines.append(f"   - Ideal para: {plan['ideal_for']}")
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+
+def _bullets(items: List[str], prefix: str) -> str:
+    """Formata uma lista com marcadores"""
+    return '\n'.join(prefix + item for item in items)
+
+
+def _numbered(items: List[str]) -> str:
+    """Formata uma lista numerada"""
+    return '\n'.join(f'{number}. {item}' for number, item in enumerate(items, 1))
+
+
+@lru_cache(maxsize=None)
+def sales_instruction() -> str:
+    """Retorna a instrução de sistema do assistente de vendas
+    
+    O texto é igual para todos os leads; é montado uma única vez, a partir
+    do mesmo catálogo usado no checkout, e enviado como instrução de sistema
+    do modelo.
+    
+    Returns:
+        Instrução de sistema
+    """
+    return f"""Você é um assistente de vendas inteligente da VENDEXA.
+
+**SOBRE A VENDEXA:**
+VENDEXA é um Sistema de Vendas Autônomo com IA que automatiza 100% do processo de vendas.
+
+**PLANOS E PREÇOS:**
+
+{_plan_section(PLANS)}
+
+**BENEFÍCIOS:**
+{_bullets(BENEFITS, '- ✅ ')}
+
+**SEU OBJETIVO:**
+{_numbered(GOALS)}
+
+**IMPORTANTE:**
+{_bullets(GUIDELINES, '- ')}
+
+As informações do lead são enviadas no início de cada conversa.
+
+Responda em português do Brasil.
+"""
+
+
+def lead_context(lead_info: Dict) -> str:
+    """Monta o bloco com as informações de um lead
+    
+    Args:
+        lead_info: Informações do lead (nome, empresa, interesse, orçamento)
+        
+    Returns:
+        Bloco curto enviado no início da conversa
+    """
+    return f"""**Informações do Lead:**
+- Nome: {lead_info.get('nome') or 'Cliente'}
+- Empresa: {lead_info.get('empresa') or 'Não informado'}
+- Interesse: {lead_info.get('interesse') or 'Automação de vendas'}
+- Orçamento: {lead_info.get('orcamento') or 'A definir'}"""
+
+
+def greeting(lead_info: Dict) -> str:
+    """Monta a mensagem inicial de uma conversa
+    
+    Args:
+        lead_info: Informações do lead
+        
+    Returns:
+        Saudação
+    """
+    return f"""Olá {lead_info.get('nome') or 'Cliente'}! 👋
+
+Sou o assistente virtual da VENDEXA. Estou aqui para ajudá-lo a encontrar a melhor solução para suas necessidades.
+
+Como posso ajudá-lo hoje?"""
+
+
+def intent_prompt(message: str) -> str:
+    """Monta o pedido de análise de intenção de uma mensagem
+    
+    Args:
+        message: Mensagem do cliente
+        
+    Returns:
+        Prompt que pede a análise em JSON
+    """
+    return f"""
+Analise a seguinte mensagem de um cliente e identifique:
+1. Intenção principal (interesse, dúvida, objeção, pronto_para_comprar, despedida)
+2. Nível de interesse (baixo, médio, alto)
+3. Sentimento (positivo, neutro, negativo)
+
+Mensagem: "{message}"
+
+Responda APENAS em formato JSON:
+{{
+    "intencao": "...",
+    "nivel_interesse": "...",
+    "sentimento": "...",
+    "resumo": "..."
+}}
+"""
+
+
+def proposal_prompt(lead_info: Dict, requirements: str) -> str:
+    """Monta o pedido de uma proposta comercial
+    
+    Args:
+        lead_info: Informações do lead
+        requirements: Requisitos identificados
+        
+    Returns:
+        Prompt da proposta
+    """
+    return f"""
+Crie uma proposta comercial profissional baseada nas seguintes informações:
+
+Cliente: {lead_info.get('nome', 'Cliente')}
+Empresa: {lead_info.get('empresa', 'Não informado')}
+Requisitos: {requirements}
+Orçamento: {lead_info.get('orcamento', 'A definir')}
+
+A proposta deve incluir:
+1. Saudação personalizada
+2. Resumo das necessidades identificadas
+3. Solução proposta
+4. Benefícios principais
+5. Investimento
+6. Próximos passos
+7. Chamada para ação
+
+Formate de forma profissional e persuasiva.
+"""
+
+
+if __name__ == "__main__":
+    print(sales_instruction())
@@ -4,12 +4,93 @@ VENDEXA - Sistema de Prospecção Automática
 Identifica e qualifica leads automaticamente
 """
 
+import base64
+import heapq
+import json
 import random
+import threading
 import time
 from datetime import datetime
-from typing import Dict, List
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
 import sqlite3
 
+from core.cache import LRUCache, load_cache_settings
+from core.interaction_writer import InteractionWriter, intent_columns
+from core.scoring import load_score_weights, score_lead, score_sql
+from database.archive import get_archived_history, get_archived_intent_examples
+from database.connection import get_connection_manager
+from database.funnel import get_funnel, merge_funnels
+from database.shards import get_shard_set
+from database.stats import read_shard_counters
+
+LEAD_COLUMNS = (
+    'id', 'nome', 'email', 'telefone', 'empresa', 'cargo', 'interesse', 'orcamento', 'fonte',
+    'status', 'score', 'data_criacao', 'ultima_interacao', 'notas', 'interaction_count'
+)
+
+# Ordenações disponíveis na listagem paginada (coluna de ordenação, desempate por id)
+LEAD_ORDERINGS = {
+    'recentes': 'data_criacao',
+    'score': 'score'
+}
+
+def encode_cursor(values: List) -> str:
+    """Codifica a posição de uma página em um cursor opaco
+    
+    Args:
+        values: Valores da última linha da página (coluna de ordenação e id)
+        
+    Returns:
+        Cursor em base64
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> List:
+    """Decodifica um cursor gerado por encode_cursor
+    
+    Args:
+        cursor: Cursor em base64
+        
+    Returns:
+        Valores da coluna de ordenação e id
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError('Cursor inválido')
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Cursor inválido')
+    return values
+
+def _desc_key(*columns: str) -> Callable[[Dict], tuple]:
+    """Chave de ordenação para combinar resultados ordenados com DESC
+    
+    NULL fica depois de qualquer valor, como no ORDER BY ... DESC do SQLite.
+    
+    Args:
+        columns: Colunas de ordenação
+        
+    Returns:
+        Função que extrai a chave de um dicionário
+    """
+    return lambda row: tuple((row[column] is not None, row[column]) for column in columns)
+
+def build_fts_query(query: str) -> str:
+    """Converte o texto digitado em uma consulta FTS5 segura
+    
+    Cada palavra vira um termo entre aspas (todas obrigatórias), o que
+    neutraliza operadores e caracteres especiais da sintaxe FTS5.
+    
+    Args:
+        query: Texto de busca
+        
+    Returns:
+        Consulta FTS5
+    """
+    terms = [term.replace('"', '') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms if term)
+
 class Prospector:
     """Sistema de prospecção automática de leads"""
     
@@ -20,46 +101,47 @@ class Prospector:
             db_path: Caminho para o banco de dados
         """
         self.db_path = db_path
+        self.db = get_connection_manager(db_path)
+        # Bancos que guardam leads e interações (apenas self.db sem particionamento)
+        self.shards = get_shard_set(db_path)
+        self.score_weights = load_score_weights()
+        self.score_expression = score_sql(self.score_weights)
+        
+        cache_settings = load_cache_settings('leads', {
+            'max_itens': 10000,
+            'ttl_segundos': 30,
+            'invalidacao_entre_processos': True
+        })
+        self.lead_cache = LRUCache(cache_settings['max_itens'], cache_settings['ttl_segundos'])
+        self.cross_process_invalidation = cache_settings['invalidacao_entre_processos']
+        
         self.initialize_database()
+        
+        # Versão dos dados de cada partição vista por uma conexão própria,
+        # compartilhada pelas threads, e gravações do processo até então
+        self._version_lock = threading.Lock()
+        self._version_connections = {}
+        self._data_versions = {}
+        if self.cross_process_invalidation:
+            for index, manager in enumerate(self.shards.managers):
+                self._version_connections[index] = manager.open_connection()
+                self._check_data_version(index)
+        
+        # Gravação assíncrona (write-behind) das interações, se habilitada
+        write_behind = self.db.settings.get('write_behind', {})
+        self.interaction_writer = None
+        if write_behind.get('ativo'):
+            self.interaction_writer = InteractionWriter(
+                self,
+                write_behind.get('tamanho_lote', 200),
+                write_behind.get('intervalo_ms', 50),
+                write_behind.get('max_tentativas', 5)
+            )
     
     def initialize_database(self):
         """Cria as tabelas necessárias no banco de dados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS leads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                telefone TEXT,
-                empresa TEXT,
-                cargo TEXT,
-                interesse TEXT,
-                orcamento TEXT,
-                fonte TEXT,
-                status TEXT DEFAULT 'novo',
-                score INTEGER DEFAULT 0,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ultima_interacao TIMESTAMP,
-                notas TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                lead_id INTEGER,
-                tipo TEXT,
-                mensagem TEXT,
-                resposta TEXT,
-                data TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (lead_id) REFERENCES leads(id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        self.db.ensure_schema()
+        self.shards.ensure_schema()
     
     def add_lead(self, lead_data: Dict) -> int:
         """Adiciona um novo lead ao banco de dados
@@ -70,34 +152,147 @@ class Prospector:
         Returns:
             ID do lead criado
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # O email define a partição, então a unicidade continua garantida pelo banco
+        index = self.shards.index_for_email(lead_data.get('email'))
+        id_column, id_value, id_params = self.shards.insert_id(index)
+        manager = self.shards.managers[index]
+        conn = manager.get_connection()
         
         try:
-            cursor.execute('''
-                INSERT INTO leads (nome, email, telefone, empresa, cargo, interesse, orcamento, fonte)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                lead_data.get('nome'),
-                lead_data.get('email'),
-                lead_data.get('telefone', ''),
-                lead_data.get('empresa', ''),
-                lead_data.get('cargo', ''),
-                lead_data.get('interesse', ''),
-                lead_data.get('orcamento', ''),
-                lead_data.get('fonte', 'manual')
-            ))
-            
-            lead_id = cursor.lastrowid
-            conn.commit()
-            return lead_id
+            with manager.transaction() as conn:
+                cursor = conn.execute(f'''
+                    INSERT INTO leads ({id_column}nome, email, telefone, empresa, cargo, interesse, orcamento, fonte, score)
+                    VALUES ({id_value}?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', id_params + [
+                    lead_data.get('nome'),
+                    lead_data.get('email'),
+                    lead_data.get('telefone', ''),
+                    lead_data.get('empresa', ''),
+                    lead_data.get('cargo', ''),
+                    lead_data.get('interesse', ''),
+                    lead_data.get('orcamento', ''),
+                    lead_data.get('fonte', 'manual'),
+                    score_lead(lead_data, self.score_weights)
+                ])
+            return cursor.lastrowid
         except sqlite3.IntegrityError:
             # Email já existe
-            cursor.execute('SELECT id FROM leads WHERE email = ?', (lead_data.get('email'),))
+            cursor = conn.execute('SELECT id FROM leads WHERE email = ?', (lead_data.get('email'),))
             result = cursor.fetchone()
             return result[0] if result else None
-        finally:
-            conn.close()
+    
+    def add_leads_bulk(self, leads: Iterable[Dict], chunk_size: int = 1000,
+                       on_chunk: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Importa leads em lote, com upsert por email
+        
+        Cada bloco de `chunk_size` leads é gravado em uma única transação.
+        Emails já cadastrados têm os campos vazios completados com os novos dados.
+        
+        Args:
+            leads: Iterável de dicionários com os dados dos leads
+            chunk_size: Quantidade de leads por transação
+            on_chunk: Função chamada com as métricas de cada bloco gravado
+            
+        Returns:
+            Resumo da importação (inseridos, atualizados, ignorados e vazão)
+            
+        Raises:
+            ValueError: chunk_size não positivo
+        """
+        if chunk_size <= 0:
+            raise ValueError('chunk_size deve ser positivo')
+        summary = {'rows': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'chunks': 0}
+        started = time.perf_counter()
+        iterator = iter(leads)
+        
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            
+            chunk_started = time.perf_counter()
+            inserted = updated = skipped = 0
+            touched = []
+            
+            by_shard = {}
+            for lead_data in chunk:
+                nome = (lead_data.get('nome') or '').strip()
+                email = (lead_data.get('email') or '').strip()
+                if not nome or not email:
+                    skipped += 1
+                    continue
+                by_shard.setdefault(self.shards.index_for_email(email), []).append((nome, email, lead_data))
+            
+            # Uma transação por partição envolvida no bloco
+            for index, shard_leads in by_shard.items():
+                id_column, id_value, id_params = self.shards.insert_id(index)
+                shard_touched = []
+                new_ids = set()
+                
+                with self.shards.managers[index].transaction() as conn:
+                    max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM leads').fetchone()[0]
+                    
+                    for nome, email, lead_data in shard_leads:
+                        lead_id = conn.execute(f'''
+                            INSERT INTO leads ({id_column}nome, email, telefone, empresa, cargo, interesse, orcamento, fonte)
+                            VALUES ({id_value}?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT(email) DO UPDATE SET
+                                nome = excluded.nome,
+                                telefone = COALESCE(NULLIF(excluded.telefone, ''), leads.telefone),
+                                empresa = COALESCE(NULLIF(excluded.empresa, ''), leads.empresa),
+                                cargo = COALESCE(NULLIF(excluded.cargo, ''), leads.cargo),
+                                interesse = COALESCE(NULLIF(excluded.interesse, ''), leads.interesse),
+                                orcamento = COALESCE(NULLIF(excluded.orcamento, ''), leads.orcamento)
+                            RETURNING id
+                        ''', id_params + [
+                            nome,
+                            email,
+                            lead_data.get('telefone') or '',
+                            lead_data.get('empresa') or '',
+                            lead_data.get('cargo') or '',
+                            lead_data.get('interesse') or '',
+                            lead_data.get('orcamento') or '',
+                            lead_data.get('fonte') or 'importacao'
+                        ]).fetchone()[0]
+                        
+                        shard_touched.append((lead_id,))
+                        if lead_id > max_id and lead_id not in new_ids:
+                            new_ids.add(lead_id)
+                            inserted += 1
+                        else:
+                            updated += 1
+                    
+                    # Recalcula o score dos leads gravados na mesma transação
+                    conn.executemany(
+                        f'UPDATE leads SET score = {self.score_expression} WHERE id = ?', shard_touched
+                    )
+                touched.extend(shard_touched)
+            
+            for (lead_id,) in touched:
+                self.lead_cache.invalidate(lead_id)
+            
+            elapsed = time.perf_counter() - chunk_started
+            summary['chunks'] += 1
+            summary['rows'] += len(chunk)
+            summary['inserted'] += inserted
+            summary['updated'] += updated
+            summary['skipped'] += skipped
+            
+            if on_chunk:
+                on_chunk({
+                    'chunk': summary['chunks'],
+                    'rows': len(chunk),
+                    'inserted': inserted,
+                    'updated': updated,
+                    'skipped': skipped,
+                    'seconds': round(elapsed, 4),
+                    'rows_per_second': round(len(chunk) / elapsed, 1) if elapsed > 0 else None
+                })
+        
+        elapsed = time.perf_counter() - started
+        summary['seconds'] = round(elapsed, 4)
+        summary['rows_per_second'] = round(summary['rows'] / elapsed, 1) if elapsed > 0 else None
+        return summary
     
     def get_lead(self, lead_id: int) -> Dict:
         """Busca um lead pelo ID
@@ -108,18 +303,52 @@ class Prospector:
         Returns:
             Dados do lead
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        index = self.shards.index_for_lead(lead_id)
+        conn = self.shards.managers[index].get_connection()
+        self._check_data_version(index)
+        
+        lead = self.lead_cache.get(lead_id)
+        if lead is not None:
+            return dict(lead)
         
-        cursor.execute('SELECT * FROM leads WHERE id = ?', (lead_id,))
-        row = cursor.fetchone()
-        conn.close()
+        generation = self.lead_cache.generation()
+        row = conn.execute('SELECT * FROM leads WHERE id = ?', (lead_id,)).fetchone()
         
         if row:
-            return dict(row)
+            lead = dict(row)
+            self.lead_cache.set(lead_id, lead, generation)
+            return dict(lead)
         return None
     
+    def _check_data_version(self, shard: int = 0):
+        """Esvazia o cache de leads quando outro processo alterou o banco
+        
+        PRAGMA data_version muda quando qualquer outra conexão faz commit,
+        inclusive as das threads deste processo, cujas gravações já
+        invalidam o cache. Por isso a mudança só esvazia o cache se o
+        processo não gravou nada desde a última verificação nem está
+        gravando agora.
+        Um commit de outro processo simultâneo a gravações locais passa
+        despercebido e fica limitado ao tempo de vida do cache. Como a
+        versão não indica quais linhas mudaram, o cache inteiro é descartado.
+        
+        Args:
+            shard: Índice da partição
+        """
+        if not self.cross_process_invalidation:
+            return
+        
+        manager = self.shards.managers[shard]
+        with self._version_lock:
+            # A versão é lida antes: um commit local que ela já reflete
+            # aparece nos eventos de gravação lidos em seguida
+            version = self._version_connections[shard].execute('PRAGMA data_version').fetchone()[0]
+            events, active = manager.write_state()
+            last = self._data_versions.get(shard)
+            if last is not None and version != last[0] and events == last[1] and not active:
+                self.lead_cache.clear()
+            self._data_versions[shard] = (version, events)
+    
     def update_lead_status(self, lead_id: int, status: str):
         """Atualiza o status de um lead
         
@@ -127,17 +356,14 @@ class Prospector:
             lead_id: ID do lead
             status: Novo status (novo, contatado, qualificado, proposta, fechado, perdido)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE leads 
-            SET status = ?, ultima_interacao = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (status, lead_id))
-        
-        conn.commit()
-        conn.close()
+        with self.shards.for_lead(lead_id).transaction() as conn:
+            conn.execute('''
+                UPDATE leads
+                SET status = ?, ultima_interacao = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status, lead_id))
+        
+        self.lead_cache.invalidate(lead_id)
     
     def calculate_lead_score(self, lead_id: int) -> int:
         """Calcula o score de qualificação do lead
@@ -148,115 +374,412 @@ class Prospector:
         Returns:
             Score de 0 a 100
         """
-        lead = self.get_lead(lead_id)
-        if not lead:
-            return 0
-        
-        score = 0
-        
-        # Pontuação por informações completas
-        if lead.get('empresa'):
-            score += 20
-        if lead.get('cargo'):
-            score += 15
-        if lead.get('telefone'):
-            score += 10
-        if lead.get('orcamento'):
-            score += 25
-        
-        # Pontuação por interesse
-        if lead.get('interesse'):
-            score += 20
-        
-        # Pontuação por interações
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM interacoes WHERE lead_id = ?', (lead_id,))
-        num_interacoes = cursor.fetchone()[0]
-        conn.close()
-        
-        score += min(num_interacoes * 2, 10)
-        
-        # Atualiza o score no banco
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('UPDATE leads SET score = ? WHERE id = ?', (score, lead_id))
-        conn.commit()
-        conn.close()
-        
-        return score
+        with self.shards.for_lead(lead_id).transaction() as conn:
+            row = conn.execute(
+                f'UPDATE leads SET score = {self.score_expression} WHERE id = ? RETURNING score',
+                (lead_id,)
+            ).fetchone()
+        
+        self.lead_cache.invalidate(lead_id)
+        return row[0] if row else 0
     
-    def get_hot_leads(self, min_score: int = 60) -> List[Dict]:
-        """Retorna leads com alto potencial
+    def rescore_all_leads(self, chunk_size: int = 5000, weights: Optional[Dict] = None,
+                          on_chunk: Optional[Callable[[Dict], None]] = None,
+                          keep_weights: bool = False) -> Dict:
+        """Recalcula o score de todos os leads com SQL em lote
+        
+        Percorre a tabela em faixas de ID, uma transação por faixa, gravando
+        apenas os leads cujo score mudou.
+        
+        Sem `weights`, os pesos são recarregados do config.json e passam a
+        valer também para os scores seguintes (add_lead, log_interaction).
+        Pesos informados valem só para esta execução, a menos que
+        `keep_weights` seja verdadeiro.
         
         Args:
-            min_score: Score mínimo
+            chunk_size: Quantidade de IDs por transação
+            weights: Pesos de score desta execução (padrão: config.json)
+            on_chunk: Função chamada com as métricas de cada faixa
+            keep_weights: Mantém `weights` como pesos do Prospector
             
         Returns:
-            Lista de leads qualificados
+            Resumo com leads processados, alterados e vazão em leads/segundo
+            
+        Raises:
+            ValueError: chunk_size não positivo
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        if chunk_size <= 0:
+            raise ValueError('chunk_size deve ser positivo')
+        if weights is None:
+            weights, keep_weights = load_score_weights(), True
+        score_expression = score_sql(weights)
+        if keep_weights:
+            self.score_weights, self.score_expression = weights, score_expression
+        
+        summary = {'leads': 0, 'changed': 0, 'chunks': 0}
+        started = time.perf_counter()
+        # Cada partição guarda um ID a cada N, então a faixa cresce na mesma proporção
+        id_step = chunk_size * self.shards.count
+        
+        for manager in self.shards.managers:
+            conn = manager.get_connection()
+            max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM leads').fetchone()[0]
+            
+            for start in range(0, max_id, id_step):
+                chunk_started = time.perf_counter()
+                end = start + id_step
+                
+                with manager.transaction() as conn:
+                    total = conn.execute(
+                        'SELECT COUNT(*) FROM leads WHERE id > ? AND id <= ?', (start, end)
+                    ).fetchone()[0]
+                    changed = conn.execute(f'''
+                        UPDATE leads SET score = {score_expression}
+                        WHERE id > ? AND id <= ? AND score IS NOT ({score_expression})
+                    ''', (start, end)).rowcount
+                
+                elapsed = time.perf_counter() - chunk_started
+                summary['leads'] += total
+                summary['changed'] += changed
+                summary['chunks'] += 1
+                
+                if on_chunk:
+                    on_chunk({
+                        'chunk': summary['chunks'],
+                        'leads': total,
+                        'changed': changed,
+                        'seconds': round(elapsed, 4),
+                        'leads_per_second': round(total / elapsed, 1) if elapsed > 0 else None
+                    })
+        
+        self.lead_cache.clear()
+        
+        elapsed = time.perf_counter() - started
+        summary['seconds'] = round(elapsed, 4)
+        summary['leads_per_second'] = round(summary['leads'] / elapsed, 1) if elapsed > 0 else None
+        return summary
+    
+    def list_leads(self, order_by: str = 'recentes', cursor: Optional[str] = None, limit: int = 50,
+                   fields: Optional[List[str]] = None, status: Optional[List[str]] = None,
+                   min_score: Optional[int] = None, max_score: Optional[int] = None) -> Dict:
+        """Lista leads com paginação por cursor (keyset)
         
-        cursor.execute('''
-            SELECT * FROM leads 
-            WHERE score >= ? AND status NOT IN ('fechado', 'perdido')
-            ORDER BY score DESC, data_criacao DESC
-        ''', (min_score,))
+        Cada página parte da última linha da anterior, usando os índices
+        (data_criacao, id) ou (score, id), sem OFFSET.
         
-        leads = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        Args:
+            order_by: 'recentes' (data_criacao) ou 'score', sempre decrescente
+            cursor: Cursor retornado pela página anterior
+            limit: Quantidade máxima de leads (até 500)
+            fields: Colunas a retornar (padrão: todas)
+            status: Filtra pelos status informados
+            min_score: Score mínimo
+            max_score: Score máximo
+            
+        Returns:
+            Dicionário com os leads da página e o cursor da próxima (ou None)
+        """
+        if order_by not in LEAD_ORDERINGS:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+        sort_column = LEAD_ORDERINGS[order_by]
+        
+        fields = list(fields or LEAD_COLUMNS)
+        invalid = [field for field in fields if field not in LEAD_COLUMNS]
+        if invalid:
+            raise ValueError(f"Campos inválidos: {', '.join(invalid)}")
+        columns = list(dict.fromkeys(['id', sort_column] + fields))
+        
+        conditions = []
+        params = []
+        if status:
+            conditions.append(f"status IN ({', '.join('?' for _ in status)})")
+            params.extend(status)
+        if min_score is not None:
+            conditions.append('score >= ?')
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append('score <= ?')
+            params.append(max_score)
+        if cursor:
+            conditions.append(f'({sort_column}, id) < (?, ?)')
+            params.extend(decode_cursor(cursor))
+        
+        limit = max(1, min(int(limit), 500))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        def query(manager):
+            with manager.reader() as conn:
+                return [dict(row) for row in conn.execute(f'''
+                    SELECT {', '.join(columns)} FROM leads
+                    {where}
+                    ORDER BY {sort_column} DESC, id DESC
+                    LIMIT ?
+                ''', params + [limit + 1])]
+        
+        # Cada partição devolve sua própria página; a combinação mantém a ordem global
+        rows = list(islice(
+            heapq.merge(*self.shards.scatter(query), key=_desc_key(sort_column, 'id'), reverse=True),
+            limit + 1
+        ))
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][sort_column], rows[-1]['id']])
+        
+        return {
+            'leads': [{field: row[field] for field in fields} for row in rows],
+            'next_cursor': next_cursor
+        }
+    
+    def get_hot_leads(self, min_score: int = 60, limit: Optional[int] = None,
+                      fields: Optional[List[str]] = None) -> List[Dict]:
+        """Retorna leads com alto potencial
         
-        return leads
+        Args:
+            min_score: Score mínimo
+            limit: Quantidade máxima de leads (padrão: todos)
+            fields: Colunas a retornar (padrão: todas)
+            
+        Returns:
+            Lista de leads qualificados, do maior score para o menor (empates:
+            mais recentes primeiro, pelo ID), lidos pelo índice (score, id)
+        """
+        fields = list(fields or LEAD_COLUMNS)
+        invalid = [field for field in fields if field not in LEAD_COLUMNS]
+        if invalid:
+            raise ValueError(f"Campos inválidos: {', '.join(invalid)}")
+        
+        columns = list(dict.fromkeys(['score', 'id'] + fields))
+        
+        def query(manager):
+            with manager.reader() as conn:
+                return [dict(row) for row in conn.execute(f'''
+                    SELECT {', '.join(columns)} FROM leads
+                    WHERE score >= ? AND status NOT IN ('fechado', 'perdido')
+                    ORDER BY score DESC, id DESC
+                    LIMIT ?
+                ''', (min_score, -1 if limit is None else limit))]
+        
+        rows = heapq.merge(*self.shards.scatter(query), key=_desc_key('score', 'id'), reverse=True)
+        return [{field: row[field] for field in fields} for row in islice(rows, limit)]
     
-    def log_interaction(self, lead_id: int, tipo: str, mensagem: str, resposta: str = ''):
+    def log_interaction(self, lead_id: int, tipo: str, mensagem: str, resposta: str = '',
+                        intent: Optional[Dict] = None) -> int:
         """Registra uma interação com o lead
         
+        O contador de interações é mantido por trigger e o score é
+        recalculado na mesma transação. No modo write-behind a interação vai
+        para a fila de gravação e o score retornado é o projetado.
+        
         Args:
             lead_id: ID do lead
             tipo: Tipo de interação (email, chat, telefone, etc)
             mensagem: Mensagem enviada
             resposta: Resposta recebida
+            intent: Análise de intenção da mensagem (intencao,
+                nivel_interesse, sentimento), gravada junto
+                
+        Returns:
+            Score atualizado do lead
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO interacoes (lead_id, tipo, mensagem, resposta)
-            VALUES (?, ?, ?, ?)
-        ''', (lead_id, tipo, mensagem, resposta))
-        
-        cursor.execute('''
-            UPDATE leads SET ultima_interacao = CURRENT_TIMESTAMP WHERE id = ?
-        ''', (lead_id,))
+        if self.interaction_writer:
+            self.interaction_writer.enqueue(lead_id, tipo, mensagem, resposta, intent)
+            lead = self.get_lead(lead_id)
+            if not lead:
+                return 0
+            lead['interaction_count'] = (lead.get('interaction_count') or 0) + \
+                self.interaction_writer.pending_count(lead_id)
+            return score_lead(lead, self.score_weights)
+        
+        with self.shards.for_lead(lead_id).transaction() as conn:
+            conn.execute('''
+                INSERT INTO interacoes (lead_id, tipo, mensagem, resposta, intencao, nivel_interesse, sentimento)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (lead_id, tipo, mensagem, resposta) + intent_columns(intent))
+            
+            row = conn.execute(f'''
+                UPDATE leads
+                SET ultima_interacao = CURRENT_TIMESTAMP, score = {self.score_expression}
+                WHERE id = ?
+                RETURNING score
+            ''', (lead_id,)).fetchone()
+        
+        self.lead_cache.invalidate(lead_id)
+        return row[0] if row else 0
+    
+    def search_interactions(self, query: str, lead_id: Optional[int] = None, limit: int = 20) -> List[Dict]:
+        """Busca textual em mensagens e respostas, ordenada por relevância
         
-        conn.commit()
-        conn.close()
+        Args:
+            query: Palavras a buscar (todas devem aparecer)
+            lead_id: Restringe a busca a um lead
+            limit: Quantidade máxima de resultados (até 100)
+            
+        Returns:
+            Interações encontradas com trechos destacados
+        """
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            return []
+        
+        params = [fts_query]
+        lead_filter = ''
+        if lead_id is not None:
+            lead_filter = 'AND i.lead_id = ?'
+            params.append(lead_id)
+        limit = max(1, min(int(limit), 100))
+        params.append(limit)
+        
+        def search(manager):
+            with manager.reader() as conn:
+                return [dict(row) for row in conn.execute(f'''
+                    SELECT i.id, i.lead_id, i.tipo, i.data, l.nome, l.email,
+                           snippet(interacoes_fts, 0, '<b>', '</b>', '...', 16) AS trecho_mensagem,
+                           snippet(interacoes_fts, 1, '<b>', '</b>', '...', 16) AS trecho_resposta,
+                           bm25(interacoes_fts) AS relevancia
+                    FROM interacoes_fts
+                    JOIN interacoes i ON i.id = interacoes_fts.rowid
+                    LEFT JOIN leads l ON l.id = i.lead_id
+                    WHERE interacoes_fts MATCH ? {lead_filter}
+                    ORDER BY relevancia
+                    LIMIT ?
+                ''', params)]
+        
+        if lead_id is not None:
+            return search(self.shards.for_lead(lead_id))
+        
+        # Relevância calculada em cada partição, combinada pela ordem crescente do bm25
+        results = heapq.merge(*self.shards.scatter(search), key=lambda row: row['relevancia'])
+        return list(islice(results, limit))
     
-    def get_lead_history(self, lead_id: int) -> List[Dict]:
+    def get_lead_history(self, lead_id: int, full_history: bool = False) -> List[Dict]:
         """Retorna o histórico de interações de um lead
         
         Args:
             lead_id: ID do lead
+            full_history: Inclui as interações movidas para o banco de arquivo
             
         Returns:
             Lista de interações
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        # Garante que o histórico inclua as interações ainda na fila
+        if self.interaction_writer and self.interaction_writer.pending_count(lead_id):
+            self.interaction_writer.flush()
         
-        cursor.execute('''
-            SELECT * FROM interacoes 
+        manager = self.shards.for_lead(lead_id)
+        cursor = manager.get_connection().execute('''
+            SELECT * FROM interacoes
             WHERE lead_id = ?
             ORDER BY data DESC
         ''', (lead_id,))
         
         history = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        
+        if full_history:
+            # Uma interação pode constar nos dois bancos se o arquivamento foi interrompido
+            hot_ids = {interaction['id'] for interaction in history}
+            archived = [
+                interaction for interaction in get_archived_history(manager, lead_id)
+                if interaction['id'] not in hot_ids
+            ]
+            history = sorted(history + archived, key=lambda interaction: interaction['data'] or '', reverse=True)
         
         return history
+    
+    def get_chat_interactions(self, lead_id: int, limit: int = 20) -> List[Dict]:
+        """Retorna as interações de chat mais recentes de um lead
+        
+        Args:
+            lead_id: ID do lead
+            limit: Quantidade máxima de interações
+            
+        Returns:
+            Interações (id, mensagem, resposta, data), da mais recente para a mais antiga
+        """
+        if self.interaction_writer and self.interaction_writer.pending_count(lead_id):
+            self.interaction_writer.flush()
+        
+        cursor = self.shards.for_lead(lead_id).get_connection().execute('''
+            SELECT id, mensagem, resposta, data FROM interacoes
+            WHERE lead_id = ? AND tipo = 'chat'
+            ORDER BY data DESC, id DESC
+            LIMIT ?
+        ''', (lead_id, limit))
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def get_intent_examples(self, limit: int = 5000) -> List[Dict]:
+        """Retorna as mensagens com análise de intenção gravada
+        
+        Inclui as interações arquivadas quando as do banco principal não
+        bastam para o limite.
+        
+        Args:
+            limit: Quantidade máxima de mensagens (as mais recentes)
+            
+        Returns:
+            Mensagens com intencao, nivel_interesse e sentimento
+        """
+        per_shard = max(1, -(-limit // self.shards.count))
+        
+        def query(manager):
+            with manager.reader() as conn:
+                rows = [dict(row) for row in conn.execute('''
+                    SELECT mensagem, intencao, nivel_interesse, sentimento FROM interacoes
+                    WHERE intencao IS NOT NULL
+                    ORDER BY id DESC
+                    LIMIT ?
+                ''', (per_shard,))]
+            # Completa com as mensagens rotuladas que já foram arquivadas
+            return rows + get_archived_intent_examples(manager, per_shard - len(rows))
+        
+        return [row for rows in self.shards.scatter(query) for row in rows][:limit]
+    
+    def get_recent_interactions(self, limit: int = 50) -> List[Dict]:
+        """Retorna as interações mais recentes de todos os leads
+        
+        Args:
+            limit: Quantidade máxima de interações
+            
+        Returns:
+            Interações com nome e email do lead, da mais recente para a mais antiga
+        """
+        def query(manager):
+            with manager.reader() as conn:
+                return [dict(row) for row in conn.execute('''
+                    SELECT i.*, l.nome, l.email
+                    FROM interacoes i
+                    JOIN leads l ON i.lead_id = l.id
+                    ORDER BY i.data DESC
+                    LIMIT ?
+                ''', (limit,))]
+        
+        rows = heapq.merge(*self.shards.scatter(query), key=_desc_key('data'), reverse=True)
+        return list(islice(rows, limit))
+    
+    def get_funnel(self, since: Optional[str] = None, until: Optional[str] = None) -> Dict:
+        """Retorna o funil de vendas (conversão e tempo por etapa)
+        
+        Args:
+            since: Considera apenas leads criados a partir desta data
+            until: Considera apenas leads criados antes desta data
+            
+        Returns:
+            Funil calculado por database.funnel, combinado entre as partições
+        """
+        def query(manager):
+            with manager.reader() as conn:
+                return get_funnel(conn, since, until)
+        
+        return merge_funnels(self.shards.scatter(query))
+    
+    def get_counters(self) -> Dict[str, float]:
+        """Retorna os contadores de estatísticas somados entre as partições
+        
+        Returns:
+            Dicionário chave -> valor (ver database.stats)
+        """
+        return read_shard_counters(self.shards)
 
 if __name__ == "__main__":
     print("Sistema de Prospecção VENDEXA inicializado com sucesso!")
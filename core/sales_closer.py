@@ -8,6 +8,8 @@ from typing import Dict, List
 from datetime import datetime, timedelta
 import json
 
+from database.stats import leads_by_status
+
 class SalesCloser:
     """Sistema automático de fechamento de vendas"""
     
@@ -220,25 +222,14 @@ O que prefere?
         Returns:
             Métricas consolidadas
         """
-        import sqlite3
-        
-        conn = sqlite3.connect(self.prospector.db_path)
-        cursor = conn.cursor()
-        
-        # Total de leads
-        cursor.execute('SELECT COUNT(*) FROM leads')
-        total_leads = cursor.fetchone()[0]
-        
-        # Leads por status
-        cursor.execute('SELECT status, COUNT(*) FROM leads GROUP BY status')
-        status_counts = dict(cursor.fetchall())
+        counters = self.prospector.get_counters()
+        total_leads = int(counters.get('leads_total', 0))
+        status_counts = leads_by_status(counters)
         
         # Taxa de conversão
         won = status_counts.get('fechado', 0)
         conversion_rate = (won / total_leads * 100) if total_leads > 0 else 0
         
-        conn.close()
-        
         return {
             'total_leads': total_leads,
             'won': won,
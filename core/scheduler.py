@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Tarefas Periódicas
+Executa rotinas de manutenção em segundo plano, em intervalos fixos
+"""
+
+import atexit
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class PeriodicJob:
+    """Executa uma função em intervalos fixos em uma thread própria"""
+    
+    def __init__(self, name: str, interval: float, func: Callable, run_at_start: bool = True):
+        """Inicializa a tarefa (sem iniciá-la)
+        
+        Args:
+            name: Nome da tarefa (usado na thread e nas métricas)
+            interval: Intervalo entre execuções, em segundos
+            func: Função sem argumentos a executar
+            run_at_start: Executa logo ao iniciar, sem esperar o primeiro intervalo
+        """
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_at_start = run_at_start
+        
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        
+        self.runs = 0
+        self.errors = 0
+        self.last_duration = None
+        self.last_result = None
+        self.last_error = None
+    
+    def start(self) -> 'PeriodicJob':
+        """Inicia a thread da tarefa
+        
+        Returns:
+            A própria tarefa
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f'vendexa-{self.name}', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+    
+    def run_now(self) -> Optional[object]:
+        """Executa a tarefa imediatamente, na thread atual
+        
+        Execuções simultâneas (manual e agendada) são serializadas.
+        
+        Returns:
+            Resultado da função, ou None em caso de erro
+        """
+        with self._run_lock:
+            started = time.perf_counter()
+            try:
+                self.last_result = self.func()
+                self.last_error = None
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                self.last_result = None
+                print(f"Erro na tarefa {self.name}: {e}")
+            self.runs += 1
+            self.last_duration = round(time.perf_counter() - started, 4)
+            return self.last_result
+    
+    def _loop(self):
+        """Laço da thread da tarefa"""
+        if not self.run_at_start:
+            self._stop.wait(self.interval)
+        while not self._stop.is_set():
+            self.run_now()
+            self._stop.wait(self.interval)
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Encerra a tarefa após a execução em andamento
+        
+        Args:
+            timeout: Tempo máximo de espera pela thread, em segundos
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+    
+    def stats(self) -> Dict:
+        """Retorna os contadores da tarefa
+        
+        Returns:
+            Execuções, erros, duração e resultado da última execução
+        """
+        return {
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'errors': self.errors,
+            'last_duration': self.last_duration,
+            'last_result': self.last_result,
+            'last_error': self.last_error
+        }
+
+
+if __name__ == "__main__":
+    print("Tarefas periódicas VENDEXA inicializadas com sucesso!")
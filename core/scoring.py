@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Regras de Score
+Pesos de qualificação de leads e sua tradução para Python e SQL
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+# Campos do lead que somam pontos quando preenchidos
+PROFILE_FIELDS = ('empresa', 'cargo', 'telefone', 'orcamento', 'interesse')
+
+DEFAULT_WEIGHTS = {
+    'empresa': 20,
+    'cargo': 15,
+    'telefone': 10,
+    'orcamento': 25,
+    'interesse': 20,
+    'por_interacao': 2,
+    'max_interacoes': 10
+}
+
+
+def load_score_weights(config_path: str = CONFIG_PATH) -> Dict:
+    """Carrega os pesos de score do config.json
+    
+    Args:
+        config_path: Caminho do arquivo de configuração
+        
+    Returns:
+        Pesos de score (valores padrão para chaves ausentes)
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            weights.update(json.load(f).get('prospeccao', {}).get('pesos_score', {}))
+    except (OSError, ValueError):
+        pass
+    return {key: int(value) for key, value in weights.items()}
+
+
+def score_lead(lead: Dict, weights: Optional[Dict] = None) -> int:
+    """Calcula o score de um lead em Python
+    
+    Args:
+        lead: Dados do lead (incluindo interaction_count)
+        weights: Pesos de score (padrão: config.json)
+        
+    Returns:
+        Score de 0 a 100
+    """
+    weights = weights or load_score_weights()
+    score = sum(weights[field] for field in PROFILE_FIELDS if lead.get(field))
+    interactions = lead.get('interaction_count') or 0
+    return score + min(interactions * weights['por_interacao'], weights['max_interacoes'])
+
+
+def score_sql(weights: Optional[Dict] = None) -> str:
+    """Gera a expressão SQL equivalente a score_lead
+    
+    A expressão usa as colunas da tabela leads e pode ser usada em
+    UPDATE leads SET score = <expressão>.
+    
+    Args:
+        weights: Pesos de score (padrão: config.json)
+        
+    Returns:
+        Expressão SQL do score
+    """
+    weights = weights or load_score_weights()
+    terms = [
+        f"(CASE WHEN COALESCE({field}, '') <> '' THEN {int(weights[field])} ELSE 0 END)"
+        for field in PROFILE_FIELDS
+    ]
+    terms.append(
+        f"MIN(COALESCE(interaction_count, 0) * {int(weights['por_interacao'])}, {int(weights['max_interacoes'])})"
+    )
+    return ' + '.join(terms)
+
+
+def main():
+    """Recalcula o score de todos os leads via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.prospector import Prospector
+    
+    parser = argparse.ArgumentParser(description='Recalcula o score de todos os leads com os pesos do config.json')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Leads por transação')
+    args = parser.parse_args()
+    
+    def report(chunk):
+        print(f"Faixa {chunk['chunk']}: {chunk['leads']} leads, {chunk['changed']} alterados "
+              f"- {chunk['leads_per_second']} leads/s")
+    
+    summary = Prospector(args.db).rescore_all_leads(args.chunk_size, on_chunk=report)
+    print(f"\nTotal: {summary['leads']} leads ({summary['changed']} alterados) em {summary['seconds']}s "
+          f"- {summary['leads_per_second']} leads/s")
+
+
+if __name__ == "__main__":
+    main()
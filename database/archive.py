@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Arquivamento de Interações
+Move interações antigas para um banco de arquivo separado, com texto comprimido
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+DEFAULT_ARCHIVE_SETTINGS = {
+    'caminho': None,
+    'dias_retencao': 90,
+    'tamanho_lote': 1000
+}
+
+# Análise de intenção gravada pelo modelo (migração 9), mantida no arquivo
+# por ser a base de treino do classificador local
+INTENT_COLUMNS = ('intencao', 'nivel_interesse', 'sentimento')
+
+# Bancos de arquivo cuja tabela já foi criada neste processo
+_initialized_archives = set()
+
+
+def archive_settings(manager) -> Dict:
+    """Retorna as configurações de arquivamento do banco
+    
+    Args:
+        manager: ConnectionManager do banco principal
+        
+    Returns:
+        Configurações da seção banco_dados.arquivo, com valores padrão
+    """
+    settings = dict(DEFAULT_ARCHIVE_SETTINGS)
+    settings.update(manager.settings.get('arquivo', {}))
+    if not settings['caminho']:
+        settings['caminho'] = os.path.splitext(manager.db_path)[0] + '_arquivo.db'
+    else:
+        # Os IDs das interações se repetem entre partições: cada uma tem seu arquivo
+        shard = re.search(r'_shard\d+$', os.path.splitext(manager.db_path)[0])
+        if shard:
+            base, extension = os.path.splitext(settings['caminho'])
+            settings['caminho'] = f'{base}{shard.group(0)}{extension or ".db"}'
+    return settings
+
+
+def _compress(text: Optional[str]) -> Optional[bytes]:
+    """Comprime um texto com zlib (None permanece None)"""
+    return None if text is None else zlib.compress(text.encode('utf-8'))
+
+
+def _decompress(data: Optional[bytes]) -> Optional[str]:
+    """Descomprime um texto gravado por _compress"""
+    return None if data is None else zlib.decompress(data).decode('utf-8')
+
+
+def _open_archive(archive_path: str):
+    """Abre o banco de arquivo, criando a tabela se necessário
+    
+    Args:
+        archive_path: Caminho do banco de arquivo
+        
+    Returns:
+        ConnectionManager do banco de arquivo
+    """
+    from database.connection import get_connection_manager
+    
+    manager = get_connection_manager(archive_path)
+    if archive_path in _initialized_archives:
+        return manager
+    
+    with manager.transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS interacoes_arquivadas (
+                id INTEGER PRIMARY KEY,
+                lead_id INTEGER,
+                tipo TEXT,
+                mensagem BLOB,
+                resposta BLOB,
+                data TIMESTAMP,
+                arquivada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                intencao TEXT,
+                nivel_interesse TEXT,
+                sentimento TEXT
+            )
+        ''')
+        # Arquivos criados antes das colunas de intenção
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(interacoes_arquivadas)')}
+        for column in INTENT_COLUMNS:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE interacoes_arquivadas ADD COLUMN {column} TEXT')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_arquivadas_lead_data
+            ON interacoes_arquivadas(lead_id, data)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_arquivadas_rotuladas
+            ON interacoes_arquivadas(id) WHERE intencao IS NOT NULL
+        ''')
+    _initialized_archives.add(archive_path)
+    return manager
+
+
+def archive_interactions(manager, max_age_days: Optional[int] = None,
+                         batch_size: Optional[int] = None) -> Dict:
+    """Move para o arquivo as interações mais antigas que o limite
+    
+    Cada lote é gravado primeiro no arquivo e só depois removido do banco
+    principal; se o processo parar no meio, a próxima execução conclui o
+    lote sem duplicar linhas. Os agregados são atualizados antes, e só
+    saem do banco interações até o watermark dos agregados, de modo que a
+    série temporal não perde as ainda não agregadas.
+    
+    Args:
+        manager: ConnectionManager do banco principal
+        max_age_days: Idade mínima em dias (padrão: configuração)
+        batch_size: Interações por lote (padrão: configuração)
+        
+    Returns:
+        Resumo com interações movidas, bytes antes/depois da compressão e duração
+    """
+    from database.rollups import rollup_watermark, update_rollups
+    from database.stats import add_archived_interactions
+    
+    settings = archive_settings(manager)
+    max_age_days = settings['dias_retencao'] if max_age_days is None else max_age_days
+    batch_size = batch_size or settings['tamanho_lote']
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime('%Y-%m-%d %H:%M:%S')
+    
+    archive = _open_archive(settings['caminho'])
+    summary = {'moved': 0, 'batches': 0, 'bytes_before': 0, 'bytes_after': 0}
+    started = time.perf_counter()
+    
+    update_rollups(manager)
+    watermark = rollup_watermark(manager.get_connection(), 'interacoes')
+    
+    while True:
+        # Linhas já movidas somem do banco principal, então cada lote recomeça do início
+        rows = manager.get_connection().execute('''
+            SELECT id, lead_id, tipo, mensagem, resposta, data, intencao, nivel_interesse, sentimento
+            FROM interacoes
+            WHERE data < ? AND id <= ?
+            ORDER BY data
+            LIMIT ?
+        ''', (cutoff, watermark, batch_size)).fetchall()
+        if not rows:
+            break
+        
+        archived = []
+        for row in rows:
+            mensagem = _compress(row['mensagem'])
+            resposta = _compress(row['resposta'])
+            summary['bytes_before'] += len((row['mensagem'] or '').encode('utf-8')) + \
+                len((row['resposta'] or '').encode('utf-8'))
+            summary['bytes_after'] += len(mensagem or b'') + len(resposta or b'')
+            archived.append((row['id'], row['lead_id'], row['tipo'], mensagem, resposta, row['data'],
+                             row['intencao'], row['nivel_interesse'], row['sentimento']))
+        
+        with archive.transaction() as conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO interacoes_arquivadas
+                    (id, lead_id, tipo, mensagem, resposta, data, intencao, nivel_interesse, sentimento)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', archived)
+        
+        with manager.transaction() as conn:
+            conn.executemany('DELETE FROM interacoes WHERE id = ?', [(row['id'],) for row in rows])
+            add_archived_interactions(conn, len(rows))
+        
+        summary['moved'] += len(rows)
+        summary['batches'] += 1
+    
+    summary['seconds'] = round(time.perf_counter() - started, 4)
+    summary['cutoff'] = cutoff
+    summary['rollup_watermark'] = watermark
+    summary['archive_path'] = settings['caminho']
+    return summary
+
+
+def count_archived_interactions(manager) -> int:
+    """Conta as interações do banco de arquivo
+    
+    Args:
+        manager: ConnectionManager do banco principal
+        
+    Returns:
+        Total de interações arquivadas (0 se o arquivo não existe)
+    """
+    archive_path = archive_settings(manager)['caminho']
+    if not os.path.exists(archive_path):
+        return 0
+    conn = _open_archive(archive_path).get_connection()
+    return conn.execute('SELECT COUNT(*) FROM interacoes_arquivadas').fetchone()[0]
+
+
+def get_archived_history(manager, lead_id: int) -> List[Dict]:
+    """Retorna as interações arquivadas de um lead
+    
+    Args:
+        manager: ConnectionManager do banco principal
+        lead_id: ID do lead
+        
+    Returns:
+        Interações arquivadas, com o texto já descomprimido
+    """
+    archive_path = archive_settings(manager)['caminho']
+    if not os.path.exists(archive_path):
+        return []
+    
+    conn = _open_archive(archive_path).get_connection()
+    cursor = conn.execute('''
+        SELECT id, lead_id, tipo, mensagem, resposta, data, intencao, nivel_interesse, sentimento
+        FROM interacoes_arquivadas
+        WHERE lead_id = ?
+        ORDER BY data DESC
+    ''', (lead_id,))
+    
+    history = []
+    for row in cursor.fetchall():
+        interaction = dict(row)
+        interaction['mensagem'] = _decompress(row['mensagem'])
+        interaction['resposta'] = _decompress(row['resposta'])
+        interaction['arquivada'] = True
+        history.append(interaction)
+    return history
+
+
+def get_archived_intent_examples(manager, limit: int) -> List[Dict]:
+    """Retorna as mensagens arquivadas com análise de intenção
+    
+    Args:
+        manager: ConnectionManager do banco principal
+        limit: Quantidade máxima de mensagens (as mais recentes)
+        
+    Returns:
+        Mensagens com intencao, nivel_interesse e sentimento
+    """
+    archive_path = archive_settings(manager)['caminho']
+    if limit <= 0 or not os.path.exists(archive_path):
+        return []
+    
+    conn = _open_archive(archive_path).get_connection()
+    cursor = conn.execute('''
+        SELECT mensagem, intencao, nivel_interesse, sentimento FROM interacoes_arquivadas
+        WHERE intencao IS NOT NULL
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (limit,))
+    return [dict(row, mensagem=_decompress(row['mensagem'])) for row in cursor.fetchall()]
+
+
+def main():
+    """Arquivamento via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.connection import get_connection_manager
+    from database.shards import get_shard_set
+    
+    parser = argparse.ArgumentParser(description='Move interações antigas para o banco de arquivo')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados principal')
+    parser.add_argument('--dias', type=int, default=None, help='Idade mínima das interações, em dias')
+    parser.add_argument('--tamanho-lote', type=int, default=None, help='Interações por lote')
+    args = parser.parse_args()
+    
+    get_connection_manager(args.db).ensure_schema()
+    # Com banco_dados.shards ativo, as interações ficam nas partições
+    shards = get_shard_set(args.db)
+    shards.ensure_schema()
+    for manager in shards.managers:
+        summary = archive_interactions(manager, args.dias, args.tamanho_lote)
+        print(f"{summary['moved']} interações anteriores a {summary['cutoff']} movidas para "
+              f"{summary['archive_path']} em {summary['seconds']}s "
+              f"({summary['bytes_before']} -> {summary['bytes_after']} bytes de texto)")
+
+
+if __name__ == "__main__":
+    main()
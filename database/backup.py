@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Backup Online
+Cópia consistente do banco em uso pela API de backup do SQLite, com compressão e rotação
+"""
+
+import argparse
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DEFAULT_BACKUP_SETTINGS = {
+    'ativo': False,
+    'diretorio': None,
+    'intervalo_horas': 24,
+    'paginas_por_passo': 1000,
+    'pausa_ms': 10,
+    'comprimir': True,
+    'manter': 7
+}
+
+
+def backup_settings(manager) -> Dict:
+    """Retorna as configurações de backup do banco
+    
+    Args:
+        manager: ConnectionManager do banco
+        
+    Returns:
+        Configurações da seção banco_dados.backup, com valores padrão
+    """
+    settings = dict(DEFAULT_BACKUP_SETTINGS)
+    settings.update(manager.settings.get('backup', {}))
+    if not settings['diretorio']:
+        settings['diretorio'] = os.path.join(os.path.dirname(manager.db_path), 'backups')
+    return settings
+
+
+def _gzip_file(source_path: str, target_path: str):
+    """Comprime um arquivo com gzip
+    
+    Args:
+        source_path: Arquivo de origem
+        target_path: Arquivo comprimido a criar
+    """
+    with open(source_path, 'rb') as source, gzip.open(target_path, 'wb', compresslevel=6) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def online_backup(manager, backup_path: str, pages: int = 1000, sleep_ms: int = 10,
+                  compress: Optional[bool] = None) -> Dict:
+    """Copia o banco em uso para um arquivo, sem bloquear as escritas
+    
+    A cópia é feita em passos de `pages` páginas com uma pausa entre eles,
+    por uma conexão própria que mantém um snapshot de leitura: o backup
+    reflete o banco no início da cópia, incluindo o conteúdo ainda no
+    arquivo -wal. O arquivo final só aparece quando a cópia termina.
+    
+    Args:
+        manager: ConnectionManager do banco
+        backup_path: Arquivo de destino
+        pages: Páginas copiadas por passo
+        sleep_ms: Pausa entre passos, em milissegundos
+        compress: Comprime com gzip (padrão: se o destino termina em .gz)
+        
+    Returns:
+        Resumo com páginas copiadas, passos, bytes, duração e bytes por segundo
+    """
+    compress = backup_path.endswith('.gz') if compress is None else compress
+    directory = os.path.dirname(os.path.abspath(backup_path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = backup_path + '.tmp'
+    
+    progress = {'steps': 0, 'pages': 0}
+    
+    def on_progress(status, remaining, total):
+        progress['steps'] += 1
+        progress['pages'] = total - remaining
+    
+    started = time.perf_counter()
+    source = manager.open_connection()
+    target = sqlite3.connect(temp_path)
+    try:
+        # Sem uma transação de leitura aberta, cada escrita de outra conexão
+        # reinicia a cópia; em WAL, o snapshot fixo deixa as escritas seguirem
+        source.execute('BEGIN')
+        source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        source.backup(target, pages=pages, progress=on_progress, sleep=sleep_ms / 1000.0)
+        page_size = target.execute('PRAGMA page_size').fetchone()[0]
+        page_count = target.execute('PRAGMA page_count').fetchone()[0]
+    except Exception:
+        target.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    copy_seconds = time.perf_counter() - started
+    
+    try:
+        if compress:
+            _gzip_file(temp_path, temp_path + '.gz')
+            os.remove(temp_path)
+            os.replace(temp_path + '.gz', backup_path)
+        else:
+            os.replace(temp_path, backup_path)
+    finally:
+        for leftover in (temp_path, temp_path + '.gz'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    
+    seconds = time.perf_counter() - started
+    database_bytes = page_size * page_count
+    return {
+        'path': backup_path,
+        'pages': progress['pages'] or page_count,
+        'steps': progress['steps'],
+        'bytes': database_bytes,
+        'bytes_written': os.path.getsize(backup_path),
+        'compressed': compress,
+        'copy_seconds': round(copy_seconds, 4),
+        'seconds': round(seconds, 4),
+        'bytes_per_second': round(database_bytes / copy_seconds) if copy_seconds else 0
+    }
+
+
+def rotate_backups(directory: str, prefix: str, keep: int) -> List[str]:
+    """Remove os backups mais antigos, mantendo os `keep` mais recentes
+    
+    Args:
+        directory: Diretório dos backups
+        prefix: Prefixo dos arquivos de backup deste banco
+        keep: Quantidade de backups a manter
+        
+    Returns:
+        Arquivos removidos
+    """
+    # O nome inclui data e hora, então a ordem alfabética é a cronológica
+    backups = sorted(
+        path for path in glob.glob(os.path.join(directory, prefix + '_*.db*'))
+        if not path.endswith('.tmp') and not path.endswith('.tmp.gz')
+    )
+    removed = backups[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def run_backup(manager, settings: Optional[Dict] = None) -> Dict:
+    """Cria um backup com nome datado e aplica a rotação
+    
+    Args:
+        manager: ConnectionManager do banco
+        settings: Configurações de backup (padrão: config.json)
+        
+    Returns:
+        Resumo do backup, incluindo os arquivos removidos pela rotação
+    """
+    settings = settings or backup_settings(manager)
+    prefix = os.path.splitext(os.path.basename(manager.db_path))[0]
+    name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    if settings['comprimir']:
+        name += '.gz'
+    
+    summary = online_backup(
+        manager,
+        os.path.join(settings['diretorio'], name),
+        settings['paginas_por_passo'],
+        settings['pausa_ms'],
+        settings['comprimir']
+    )
+    summary['removed'] = rotate_backups(settings['diretorio'], prefix, settings['manter'])
+    return summary
+
+
+def main():
+    """Backup via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.connection import get_connection_manager
+    
+    parser = argparse.ArgumentParser(description='Cria um backup online do banco de dados')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados')
+    parser.add_argument('--diretorio', default=None, help='Diretório dos backups (padrão: configuração)')
+    parser.add_argument('--sem-compressao', action='store_true', help='Grava o backup sem gzip')
+    parser.add_argument('--manter', type=int, default=None, help='Quantidade de backups a manter')
+    args = parser.parse_args()
+    
+    manager = get_connection_manager(args.db)
+    settings = backup_settings(manager)
+    if args.diretorio:
+        settings['diretorio'] = args.diretorio
+    if args.sem_compressao:
+        settings['comprimir'] = False
+    if args.manter is not None:
+        settings['manter'] = args.manter
+    
+    summary = run_backup(manager, settings)
+    print(f"Backup criado: {summary['path']} ({summary['pages']} páginas, {summary['bytes_written']} bytes) "
+          f"em {summary['seconds']}s - {summary['bytes_per_second']} bytes/s")
+    for path in summary['removed']:
+        print(f"Backup antigo removido: {path}")
+
+
+if __name__ == "__main__":
+    main()
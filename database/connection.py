@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Camada de Conexões SQLite
+Conexões reutilizáveis por thread, em modo WAL, compartilhadas por todos os componentes
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+# Valores usados quando config.json não define a seção "banco_dados"
+DEFAULT_SETTINGS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,
+    'mmap_size': 134217728,
+    'busy_timeout': 5000
+}
+
+
+def load_database_settings(config_path: str = CONFIG_PATH) -> Dict:
+    """Carrega os pragmas do banco a partir do config.json
+    
+    Args:
+        config_path: Caminho do arquivo de configuração
+        
+    Returns:
+        Dicionário com os pragmas (valores padrão para chaves ausentes)
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f).get('banco_dados', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+class ReadOnlyPool:
+    """Pequeno pool de conexões somente leitura para relatórios e painéis
+    
+    As conexões são abertas com mode=ro e PRAGMA query_only: nunca pegam
+    lock de escrita e, em WAL, leem sem bloquear nem ser bloqueadas pelas
+    gravações das conversas.
+    """
+    
+    def __init__(self, db_path: str, settings: Dict, size: int = 4, samples: int = 1000):
+        """Inicializa o pool (as conexões são abertas sob demanda)
+        
+        Args:
+            db_path: Caminho para o arquivo do banco de dados
+            settings: Pragmas do banco
+            size: Quantidade máxima de conexões
+            samples: Quantidade de latências guardadas para as métricas
+        """
+        self.db_path = db_path
+        self.settings = settings
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._opened = 0
+        
+        self.queries = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=samples)
+        self._waits = deque(maxlen=samples)
+    
+    def _open(self) -> sqlite3.Connection:
+        """Abre uma conexão somente leitura
+        
+        Returns:
+            Conexão SQLite com query_only ativo
+        """
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=self.settings['busy_timeout'] / 1000.0,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only = 1')
+        conn.execute(f"PRAGMA cache_size = {int(self.settings['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.settings['mmap_size'])}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.settings['busy_timeout'])}")
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão do pool durante o bloco
+        
+        Espera se todas as conexões estiverem em uso. O tempo de espera e o
+        tempo de uso entram nas métricas do pool.
+        
+        Yields:
+            Conexão somente leitura
+        """
+        wait_started = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - wait_started
+        conn = None
+        failed = False
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+                with self._lock:
+                    self._opened += 1
+            started = time.perf_counter()
+            try:
+                yield conn
+            except sqlite3.Error:
+                failed = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                if conn.in_transaction:
+                    conn.rollback()
+                with self._lock:
+                    self._idle.append(conn)
+                    self.queries += 1
+                    self.errors += failed
+                    self._latencies.append(elapsed)
+                    self._waits.append(waited)
+        finally:
+            self._slots.release()
+    
+    def close_all(self):
+        """Fecha as conexões ociosas do pool"""
+        with self._lock:
+            connections, self._idle = self._idle, []
+            self._opened -= len(connections)
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def stats(self) -> Dict:
+        """Retorna as métricas de latência das leituras
+        
+        Returns:
+            Consultas, erros, conexões e latências (média, p95 e máxima, em ms)
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = list(self._waits)
+            opened, idle = self._opened, len(self._idle)
+            queries, errors = self.queries, self.errors
+        
+        def ms(value):
+            return round(value * 1000, 3)
+        
+        return {
+            'queries': queries,
+            'errors': errors,
+            'size': self.size,
+            'open_connections': opened,
+            'idle_connections': idle,
+            'avg_ms': ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+            'p95_ms': ms(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]) if latencies else 0.0,
+            'max_ms': ms(latencies[-1]) if latencies else 0.0,
+            'avg_wait_ms': ms(sum(waits) / len(waits)) if waits else 0.0
+        }
+
+
+class ConnectionManager:
+    """Mantém uma conexão SQLite por thread para um arquivo de banco"""
+    
+    def __init__(self, db_path: str, settings: Optional[Dict] = None):
+        """Inicializa o gerenciador de conexões
+        
+        Args:
+            db_path: Caminho para o arquivo do banco de dados
+            settings: Pragmas do banco (padrão: seção "banco_dados" do config.json)
+        """
+        self.db_path = db_path
+        self.settings = settings if settings is not None else load_database_settings()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Conexão de cada thread que usou o banco, para fechar as de threads encerradas
+        self._connections = {}
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._read_pool = None
+        # Gravações deste processo, para distinguir os commits de outros processos
+        self.write_events = 0
+        self.active_writes = 0
+        
+        directory = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+    
+    def open_connection(self) -> sqlite3.Connection:
+        """Abre uma nova conexão já configurada (fora do pool)
+        
+        Returns:
+            Conexão SQLite com os pragmas aplicados
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.settings['busy_timeout'] / 1000.0,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA journal_mode = {self.settings['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {self.settings['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {int(self.settings['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.settings['mmap_size'])}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.settings['busy_timeout'])}")
+        return conn
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, criando-a se necessário
+        
+        Ao abrir uma nova conexão, as conexões de threads já encerradas são
+        fechadas, de modo que threads de curta duração (requisições, pools)
+        não acumulam conexões abertas.
+        
+        Returns:
+            Conexão SQLite reutilizável pela thread atual
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.open_connection()
+            self._local.conn = conn
+            with self._lock:
+                stale = [self._connections.pop(thread) for thread in list(self._connections)
+                         if not thread.is_alive()]
+                self._connections[threading.current_thread()] = conn
+            self._close(stale)
+        return conn
+    
+    def release_dead_threads(self) -> int:
+        """Fecha as conexões de threads já encerradas
+        
+        Returns:
+            Quantidade de conexões fechadas
+        """
+        with self._lock:
+            stale = [self._connections.pop(thread) for thread in list(self._connections)
+                     if not thread.is_alive()]
+        self._close(stale)
+        return len(stale)
+    
+    def open_connection_count(self) -> int:
+        """Retorna quantas conexões por thread estão abertas"""
+        with self._lock:
+            return len(self._connections)
+    
+    @staticmethod
+    def _close(connections):
+        """Fecha conexões, ignorando erros"""
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    @contextmanager
+    def transaction(self):
+        """Executa um bloco dentro de uma transação
+        
+        Faz commit ao final do bloco e rollback em caso de exceção.
+        
+        Yields:
+            Conexão da thread atual
+        """
+        conn = self.get_connection()
+        with self.local_write():
+            with conn:
+                yield conn
+    
+    @contextmanager
+    def local_write(self):
+        """Marca um trecho em que este processo grava no banco
+        
+        Usado por transaction(); quem faz commit direto na conexão (BEGIN
+        IMMEDIATE ... commit) deve envolver o trecho também. O contador
+        muda no início e no fim de cada trecho.
+        """
+        self._write_event(1)
+        try:
+            yield
+        finally:
+            self._write_event(-1)
+    
+    def _write_event(self, delta: int):
+        """Registra o início (+1) ou o fim (-1) de uma gravação local"""
+        with self._lock:
+            self.write_events += 1
+            self.active_writes += delta
+    
+    def write_state(self) -> Tuple[int, int]:
+        """Retorna (eventos de gravação, gravações em andamento) deste processo"""
+        with self._lock:
+            return self.write_events, self.active_writes
+    
+    def read_pool(self) -> ReadOnlyPool:
+        """Retorna o pool somente leitura do banco, criando-o se necessário
+        
+        Returns:
+            ReadOnlyPool com o tamanho de banco_dados.leitura.conexoes
+        """
+        if self._read_pool is None:
+            with self._lock:
+                if self._read_pool is None:
+                    size = int(self.settings.get('leitura', {}).get('conexoes', 4))
+                    self._read_pool = ReadOnlyPool(self.db_path, self.settings, size)
+        return self._read_pool
+    
+    @contextmanager
+    def reader(self):
+        """Executa consultas de relatório em uma conexão somente leitura
+        
+        Yields:
+            Conexão emprestada do pool somente leitura
+        """
+        with self.read_pool().connection() as conn:
+            yield conn
+    
+    def ensure_schema(self):
+        """Aplica as migrações pendentes uma única vez por processo"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                from database.migrations import run_migrations
+                run_migrations(self.get_connection())
+                self._schema_ready = True
+    
+    def close_all(self):
+        """Fecha todas as conexões abertas pelo gerenciador"""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        self._close(connections)
+        self._local = threading.local()
+        if self._read_pool is not None:
+            self._read_pool.close_all()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str) -> ConnectionManager:
+    """Retorna o gerenciador compartilhado de um arquivo de banco
+    
+    Args:
+        db_path: Caminho para o arquivo do banco de dados
+        
+    Returns:
+        Instância única de ConnectionManager para o caminho
+    """
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(db_path)
+            _managers[key] = manager
+        return manager
+
+
+def release_dead_thread_connections() -> int:
+    """Fecha as conexões de threads encerradas em todos os gerenciadores
+    
+    Returns:
+        Quantidade de conexões fechadas
+    """
+    with _managers_lock:
+        managers = list(_managers.values())
+    return sum(manager.release_dead_threads() for manager in managers)
+
+
+if __name__ == "__main__":
+    print("Camada de conexões VENDEXA inicializada com sucesso!")
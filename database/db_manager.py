@@ -8,6 +8,11 @@ import sqlite3
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from database.backup import online_backup
+from database.connection import get_connection_manager
+from database.shards import get_shard_set, shard_paths
+from database.stats import read_shard_counters, statistics_from_counters
+
 class DatabaseManager:
     """Gerenciador centralizado do banco de dados"""
     
@@ -18,69 +23,13 @@ class DatabaseManager:
             db_path: Caminho para o arquivo do banco de dados
         """
         self.db_path = db_path
+        self.db = get_connection_manager(db_path)
         self.initialize_database()
     
     def initialize_database(self):
         """Cria todas as tabelas necessárias"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de leads
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS leads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                telefone TEXT,
-                empresa TEXT,
-                cargo TEXT,
-                interesse TEXT,
-                orcamento TEXT,
-                fonte TEXT,
-                status TEXT DEFAULT 'novo',
-                score INTEGER DEFAULT 0,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ultima_interacao TIMESTAMP,
-                notas TEXT
-            )
-        ''')
-        
-        # Tabela de interações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                lead_id INTEGER,
-                tipo TEXT,
-                mensagem TEXT,
-                resposta TEXT,
-                data TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (lead_id) REFERENCES leads(id)
-            )
-        ''')
-        
-        # Tabela de vendas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vendas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                lead_id INTEGER,
-                valor REAL,
-                data_fechamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                observacoes TEXT,
-                FOREIGN KEY (lead_id) REFERENCES leads(id)
-            )
-        ''')
-        
-        # Tabela de configurações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS configuracoes (
-                chave TEXT PRIMARY KEY,
-                valor TEXT,
-                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        self.db.ensure_schema()
+        get_shard_set(self.db_path).ensure_schema()
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """Executa uma query SELECT
@@ -92,14 +41,11 @@ class DatabaseManager:
         Returns:
             Lista de resultados
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute(query, params)
-        results = [dict(row) for row in cursor.fetchall()]
+        # Consultas de leitura usam o pool somente leitura, sem disputar com as escritas
+        with self.db.reader() as conn:
+            cursor = conn.execute(query, params)
+            results = [dict(row) for row in cursor.fetchall()]
         
-        conn.close()
         return results
     
     def execute_update(self, query: str, params: tuple = ()) -> int:
@@ -112,14 +58,9 @@ class DatabaseManager:
         Returns:
             Número de linhas afetadas ou ID inserido
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(query, params)
-        result = cursor.lastrowid if cursor.lastrowid else cursor.rowcount
-        
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as conn:
+            cursor = conn.execute(query, params)
+            result = cursor.lastrowid if cursor.lastrowid else cursor.rowcount
         
         return result
     
@@ -127,50 +68,38 @@ class DatabaseManager:
         """Retorna estatísticas gerais do sistema
         
         Returns:
-            Dicionário com estatísticas
+            Dicionário com estatísticas (interações arquivadas incluídas no total)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # Total de leads
-        cursor.execute('SELECT COUNT(*) FROM leads')
-        stats['total_leads'] = cursor.fetchone()[0]
-        
-        # Leads por status
-        cursor.execute('SELECT status, COUNT(*) FROM leads GROUP BY status')
-        stats['leads_por_status'] = dict(cursor.fetchall())
-        
-        # Total de interações
-        cursor.execute('SELECT COUNT(*) FROM interacoes')
-        stats['total_interacoes'] = cursor.fetchone()[0]
-        
-        # Total de vendas
-        cursor.execute('SELECT COUNT(*), SUM(valor) FROM vendas')
-        vendas_data = cursor.fetchone()
-        stats['total_vendas'] = vendas_data[0]
-        stats['valor_total_vendas'] = vendas_data[1] or 0
-        
-        # Média de score
-        cursor.execute('SELECT AVG(score) FROM leads')
-        stats['score_medio'] = round(cursor.fetchone()[0] or 0, 2)
-        
-        conn.close()
-        return stats
+        # Contadores mantidos por triggers: leitura O(1), somada entre as partições
+        return statistics_from_counters(read_shard_counters(get_shard_set(self.db_path)))
     
     def backup_database(self, backup_path: str) -> bool:
         """Cria um backup do banco de dados
         
+        Usa a API de backup do SQLite: a cópia é consistente mesmo com o
+        banco em uso e inclui o conteúdo ainda no arquivo -wal. Caminhos
+        terminados em .gz são comprimidos. Com banco_dados.shards ativo, os
+        dados estão nas partições: cada uma vai para <backup>_shard<i>.
+        
         Args:
             backup_path: Caminho para o arquivo de backup
             
         Returns:
-            True se backup criado com sucesso
+            True se o backup de todos os bancos foi criado com sucesso
         """
+        shards = get_shard_set(self.db_path)
+        if not shards.sharded:
+            targets = [(self.db, backup_path)]
+        else:
+            base, compressed = backup_path, ''
+            if base.endswith('.gz'):
+                base, compressed = base[:-3], '.gz'
+            paths = [path + compressed for path in shard_paths(base, shards.count)]
+            targets = list(zip(shards.managers, paths))
+        
         try:
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
+            for manager, path in targets:
+                online_backup(manager, path)
             return True
         except Exception as e:
             print(f"Erro ao criar backup: {e}")
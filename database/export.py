@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Exportação de Dados
+Exporta leads e histórico de interações em NDJSON, em fluxo contínuo
+"""
+
+import argparse
+import json
+import os
+import sys
+import zlib
+from itertools import chain
+from typing import Dict, Iterable, Iterator
+
+
+def _iter_rows(cursor, batch_size: int) -> Iterator:
+    """Percorre um cursor em blocos com fetchmany
+    
+    Args:
+        cursor: Cursor já executado
+        batch_size: Linhas por bloco
+        
+    Yields:
+        Cada linha do cursor
+    """
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_export_records(manager, batch_size: int = 1000, include_history: bool = True) -> Iterator[Dict]:
+    """Percorre leads e interações sem carregar as tabelas em memória
+    
+    Leads e interações são lidos por cursores ordenados por lead e
+    combinados em um único passo, dentro de uma transação de leitura.
+    
+    Args:
+        manager: ConnectionManager do banco
+        batch_size: Linhas lidas por vez de cada cursor
+        include_history: Inclui as interações de cada lead
+        
+    Yields:
+        Um dicionário por lead, com a lista "interacoes" quando solicitada
+    """
+    # Conexão própria: a leitura longa não interfere nas transações da thread
+    conn = manager.open_connection()
+    try:
+        conn.execute('BEGIN')
+        leads = _iter_rows(conn.execute('SELECT * FROM leads ORDER BY id'), batch_size)
+        
+        if not include_history:
+            for lead in leads:
+                yield dict(lead)
+            return
+        
+        interactions = _iter_rows(
+            conn.execute('SELECT * FROM interacoes ORDER BY lead_id, data, id'), batch_size
+        )
+        pending = next(interactions, None)
+        
+        for lead in leads:
+            record = dict(lead)
+            record['interacoes'] = []
+            
+            while pending is not None and (pending['lead_id'] is None or pending['lead_id'] < lead['id']):
+                pending = next(interactions, None)
+            while pending is not None and pending['lead_id'] == lead['id']:
+                record['interacoes'].append(dict(pending))
+                pending = next(interactions, None)
+            
+            yield record
+    finally:
+        conn.close()
+
+
+def iter_ndjson(records: Iterable[Dict]) -> Iterator[bytes]:
+    """Serializa registros como NDJSON (um objeto JSON por linha)
+    
+    Args:
+        records: Registros a serializar
+        
+    Yields:
+        Linhas codificadas em UTF-8
+    """
+    for record in records:
+        yield (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Comprime um fluxo de bytes no formato gzip, de forma incremental
+    
+    Args:
+        chunks: Blocos de bytes
+        level: Nível de compressão (1 a 9)
+        
+    Yields:
+        Blocos comprimidos
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_ndjson(manager, include_history: bool = True, compress: bool = False,
+                  batch_size: int = 1000) -> Iterator[bytes]:
+    """Monta o fluxo completo de exportação
+    
+    Args:
+        manager: ConnectionManager do banco, ou lista com um por partição
+        include_history: Inclui as interações de cada lead
+        compress: Comprime a saída com gzip
+        batch_size: Linhas lidas por vez de cada cursor
+        
+    Returns:
+        Iterador de blocos de bytes prontos para gravar ou enviar
+    """
+    managers = manager if isinstance(manager, (list, tuple)) else [manager]
+    records = chain.from_iterable(
+        iter_export_records(shard, batch_size, include_history) for shard in managers
+    )
+    stream = iter_ndjson(records)
+    return iter_gzip(stream) if compress else stream
+
+
+def main():
+    """Exportação via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.connection import get_connection_manager
+    
+    parser = argparse.ArgumentParser(description='Exporta leads e interações em NDJSON')
+    parser.add_argument('saida', help='Arquivo de saída (.ndjson ou .ndjson.gz)')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados de origem')
+    parser.add_argument('--sem-historico', action='store_true', help='Exporta apenas os leads')
+    args = parser.parse_args()
+    
+    manager = get_connection_manager(args.db)
+    manager.ensure_schema()
+    
+    written = 0
+    with open(args.saida, 'wb') as f:
+        for chunk in export_ndjson(manager, not args.sem_historico, args.saida.endswith('.gz')):
+            f.write(chunk)
+            written += len(chunk)
+    
+    print(f"Exportação concluída: {args.saida} ({written} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Funil de Vendas
+Conversão entre etapas e tempo em cada etapa, calculados sobre status_transitions
+"""
+
+import sqlite3
+from typing import Dict, List, Optional
+
+# Etapas do funil, na ordem
+FUNNEL_STAGES = ('novo', 'contatado', 'qualificado', 'proposta', 'fechado')
+
+# Posição de cada etapa, em SQL
+_STAGE_RANK = 'CASE para ' + ' '.join(
+    f"WHEN '{stage}' THEN {rank}" for rank, stage in enumerate(FUNNEL_STAGES)
+) + ' END'
+
+
+def _cohort_filter(since: Optional[str], until: Optional[str]) -> tuple:
+    """Restringe a análise aos leads criados no período
+    
+    Args:
+        since: Data inicial (inclusiva)
+        until: Data final (exclusiva)
+        
+    Returns:
+        (condição SQL sobre lead_id, parâmetros)
+    """
+    conditions = ['de IS NULL']
+    params = []
+    if since:
+        conditions.append('em >= ?')
+        params.append(since)
+    if until:
+        conditions.append('em < ?')
+        params.append(until)
+    if len(conditions) == 1:
+        return '1 = 1', []
+    return f"lead_id IN (SELECT lead_id FROM status_transitions WHERE {' AND '.join(conditions)})", params
+
+
+def get_funnel(conn: sqlite3.Connection, since: Optional[str] = None, until: Optional[str] = None) -> Dict:
+    """Calcula o funil de vendas
+    
+    Um lead conta como tendo alcançado uma etapa se chegou a ela ou a
+    qualquer etapa posterior (etapas puladas contam como alcançadas). O
+    tempo na etapa vai da entrada nela até a transição seguinte do lead,
+    gravado pelo trigger em segundos_anterior.
+    
+    Args:
+        conn: Conexão com o banco
+        since: Considera apenas leads criados a partir desta data
+        until: Considera apenas leads criados antes desta data
+        
+    Returns:
+        Etapas com leads, conversão para a próxima etapa e mediana de
+        tempo (segundos), além do total de leads e de perdidos
+    """
+    cohort, params = _cohort_filter(since, until)
+    
+    # Etapa mais avançada de cada lead (índice lead_id, em, para); a soma
+    # acumulada da última etapa para a primeira dá os leads que alcançaram cada uma
+    by_stage = conn.execute(f'''
+        SELECT etapa, leads, perdidos,
+               SUM(leads) OVER (ORDER BY etapa DESC) AS alcancaram
+        FROM (
+            SELECT etapa, COUNT(*) AS leads, SUM(perdido) AS perdidos FROM (
+                SELECT lead_id, MAX({_STAGE_RANK}) AS etapa, MAX(para = 'perdido') AS perdido
+                FROM status_transitions
+                WHERE {cohort}
+                GROUP BY lead_id
+            )
+            GROUP BY etapa
+        )
+    ''', params).fetchall()
+    
+    cumulative = {stage: reached for stage, _, _, reached in by_stage if stage is not None}
+    reached = []
+    carry = 0
+    for rank in reversed(range(len(FUNNEL_STAGES))):
+        carry = cumulative.get(rank, carry)
+        reached.insert(0, carry)
+    
+    # Mediana do tempo em cada etapa: contagem por status de origem e leitura
+    # do elemento central direto do índice (de, segundos_anterior), já ordenado
+    duration_filter = f'segundos_anterior IS NOT NULL AND {cohort}'
+    passages = dict(conn.execute(f'''
+        SELECT de, COUNT(*) FROM status_transitions
+        WHERE de IN ({', '.join('?' for _ in FUNNEL_STAGES)}) AND {duration_filter}
+        GROUP BY de
+    ''', list(FUNNEL_STAGES) + params).fetchall())
+    
+    medians = {}
+    for stage, count in passages.items():
+        median = conn.execute(f'''
+            SELECT AVG(segundos_anterior) FROM (
+                SELECT segundos_anterior FROM status_transitions
+                WHERE de = ? AND {duration_filter}
+                ORDER BY segundos_anterior
+                LIMIT ? OFFSET ?
+            )
+        ''', [stage] + params + [2 - count % 2, (count - 1) // 2]).fetchone()[0]
+        medians[stage] = (median, count)
+    
+    return _build_funnel(
+        reached,
+        medians,
+        sum(row[2] or 0 for row in by_stage),
+        sum(row[1] for row in by_stage)
+    )
+
+
+def _build_funnel(reached: List[int], medians: Dict[str, tuple], lost: int, total: int) -> Dict:
+    """Monta o resultado do funil a partir das contagens
+    
+    Args:
+        reached: Leads que alcançaram cada etapa, na ordem de FUNNEL_STAGES
+        medians: Mediana e quantidade de passagens por etapa
+        lost: Leads que passaram por "perdido"
+        total: Leads analisados
+        
+    Returns:
+        Funil no formato de get_funnel
+    """
+    stages = []
+    for rank, stage in enumerate(FUNNEL_STAGES):
+        median, passages = medians.get(stage, (None, 0))
+        next_reached = reached[rank + 1] if rank + 1 < len(FUNNEL_STAGES) else None
+        stages.append({
+            'etapa': stage,
+            'leads': reached[rank],
+            'conversao_proxima': round(next_reached / reached[rank], 4)
+            if next_reached is not None and reached[rank] else None,
+            'mediana_segundos': round(median, 1) if median is not None else None,
+            'passagens': passages
+        })
+    
+    return {
+        'etapas': stages,
+        'total_leads': total,
+        'perdidos': lost,
+        'conversao_total': round(reached[-1] / reached[0], 4) if reached[0] else None
+    }
+
+
+def merge_funnels(funnels: List[Dict]) -> Dict:
+    """Combina funis calculados em partições diferentes
+    
+    Contagens e conversões são exatas. A mediana combinada é a média das
+    medianas das partições ponderada pela quantidade de passagens, uma
+    aproximação (os leads são distribuídos entre partições por hash).
+    
+    Args:
+        funnels: Resultados de get_funnel
+        
+    Returns:
+        Funil combinado
+    """
+    if len(funnels) == 1:
+        return funnels[0]
+    
+    medians = {}
+    for rank, stage in enumerate(FUNNEL_STAGES):
+        weighted = [
+            (funnel['etapas'][rank]['mediana_segundos'], funnel['etapas'][rank]['passagens'])
+            for funnel in funnels if funnel['etapas'][rank]['mediana_segundos'] is not None
+        ]
+        passages = sum(count for _, count in weighted)
+        if passages:
+            medians[stage] = (sum(median * count for median, count in weighted) / passages, passages)
+    
+    return _build_funnel(
+        [sum(funnel['etapas'][rank]['leads'] for funnel in funnels) for rank in range(len(FUNNEL_STAGES))],
+        medians,
+        sum(funnel['perdidos'] for funnel in funnels),
+        sum(funnel['total_leads'] for funnel in funnels)
+    )
+
+
+if __name__ == "__main__":
+    print("Funil de vendas VENDEXA carregado com sucesso!")
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Migrações de Esquema
+Evolução versionada do banco de dados, registrada na tabela schema_version
+"""
+
+import sqlite3
+from typing import List
+
+from database.stats import rebuild_stats_counters
+
+# Cada migração é (versão, descrição, lista de comandos SQL).
+# Migrações já publicadas nunca devem ser alteradas: crie uma nova versão.
+MIGRATIONS = [
+    (1, 'Tabelas iniciais', [
+        '''
+        CREATE TABLE IF NOT EXISTS leads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            telefone TEXT,
+            empresa TEXT,
+            cargo TEXT,
+            interesse TEXT,
+            orcamento TEXT,
+            fonte TEXT,
+            status TEXT DEFAULT 'novo',
+            score INTEGER DEFAULT 0,
+            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ultima_interacao TIMESTAMP,
+            notas TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS interacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER,
+            tipo TEXT,
+            mensagem TEXT,
+            resposta TEXT,
+            data TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (lead_id) REFERENCES leads(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER,
+            valor REAL,
+            data_fechamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            observacoes TEXT,
+            FOREIGN KEY (lead_id) REFERENCES leads(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS configuracoes (
+            chave TEXT PRIMARY KEY,
+            valor TEXT,
+            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    ]),
+    (2, 'Índices de consulta', [
+        # Histórico por lead e contagem de interações
+        'CREATE INDEX IF NOT EXISTS idx_interacoes_lead_data ON interacoes(lead_id, data)',
+        # Interações recentes no painel administrativo
+        'CREATE INDEX IF NOT EXISTS idx_interacoes_data ON interacoes(data)',
+        # Filtros por status com ordenação por score
+        'CREATE INDEX IF NOT EXISTS idx_leads_status_score ON leads(status, score, data_criacao)',
+        # Leads quentes (score >= ? ORDER BY score DESC, data_criacao DESC)
+        'CREATE INDEX IF NOT EXISTS idx_leads_score_data ON leads(score, data_criacao)',
+        'CREATE INDEX IF NOT EXISTS idx_vendas_lead ON vendas(lead_id)'
+    ]),
+    (3, 'Contador de interações por lead', [
+        'ALTER TABLE leads ADD COLUMN interaction_count INTEGER DEFAULT 0',
+        '''
+        UPDATE leads SET interaction_count = (
+            SELECT COUNT(*) FROM interacoes WHERE interacoes.lead_id = leads.id
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_interacoes_contador
+        AFTER INSERT ON interacoes
+        BEGIN
+            UPDATE leads SET interaction_count = interaction_count + 1 WHERE id = NEW.lead_id;
+        END
+        '''
+    ]),
+    (4, 'Índices de paginação por cursor', [
+        # (data_criacao, id) e (score, id), com e sem filtro de status
+        'CREATE INDEX IF NOT EXISTS idx_leads_data_id ON leads(data_criacao, id)',
+        'CREATE INDEX IF NOT EXISTS idx_leads_score_id ON leads(score, id)',
+        'CREATE INDEX IF NOT EXISTS idx_leads_status_data_id ON leads(status, data_criacao, id)',
+        'CREATE INDEX IF NOT EXISTS idx_leads_status_score_id ON leads(status, score, id)'
+    ]),
+    (5, 'Busca textual (FTS5) em interações', [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS interacoes_fts USING fts5(
+            mensagem, resposta,
+            content='interacoes', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_interacoes_fts_insert
+        AFTER INSERT ON interacoes
+        BEGIN
+            INSERT INTO interacoes_fts (rowid, mensagem, resposta)
+            VALUES (NEW.id, NEW.mensagem, NEW.resposta);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_interacoes_fts_delete
+        AFTER DELETE ON interacoes
+        BEGIN
+            INSERT INTO interacoes_fts (interacoes_fts, rowid, mensagem, resposta)
+            VALUES ('delete', OLD.id, OLD.mensagem, OLD.resposta);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_interacoes_fts_update
+        AFTER UPDATE OF mensagem, resposta ON interacoes
+        BEGIN
+            INSERT INTO interacoes_fts (interacoes_fts, rowid, mensagem, resposta)
+            VALUES ('delete', OLD.id, OLD.mensagem, OLD.resposta);
+            INSERT INTO interacoes_fts (rowid, mensagem, resposta)
+            VALUES (NEW.id, NEW.mensagem, NEW.resposta);
+        END
+        ''',
+        # Indexa as interações já existentes
+        "INSERT INTO interacoes_fts (interacoes_fts) VALUES ('rebuild')"
+    ]),
+    (6, 'Contadores de estatísticas mantidos por triggers', [
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            chave TEXT PRIMARY KEY,
+            valor REAL NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_leads_insert
+        AFTER INSERT ON leads
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_total', 1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_status:' || COALESCE(NEW.status, ''), 1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_score_soma', COALESCE(NEW.score, 0)) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_leads_delete
+        AFTER DELETE ON leads
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_total', -1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_status:' || COALESCE(OLD.status, ''), -1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_score_soma', -COALESCE(OLD.score, 0)) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_leads_status
+        AFTER UPDATE OF status ON leads
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_status:' || COALESCE(OLD.status, ''), -1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_status:' || COALESCE(NEW.status, ''), 1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_leads_score
+        AFTER UPDATE OF score ON leads
+        WHEN OLD.score IS NOT NEW.score
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('leads_score_soma', COALESCE(NEW.score, 0) - COALESCE(OLD.score, 0)) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_interacoes_insert
+        AFTER INSERT ON interacoes
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('interacoes_total', 1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_interacoes_delete
+        AFTER DELETE ON interacoes
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('interacoes_total', -1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_vendas_insert
+        AFTER INSERT ON vendas
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('vendas_total', 1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('vendas_valor', COALESCE(NEW.valor, 0)) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_vendas_delete
+        AFTER DELETE ON vendas
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('vendas_total', -1) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+            INSERT INTO stats_counters (chave, valor) VALUES ('vendas_valor', -COALESCE(OLD.valor, 0)) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_vendas_valor
+        AFTER UPDATE OF valor ON vendas
+        WHEN OLD.valor IS NOT NEW.valor
+        BEGIN
+            INSERT INTO stats_counters (chave, valor) VALUES ('vendas_valor', COALESCE(NEW.valor, 0) - COALESCE(OLD.valor, 0)) ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor;
+        END
+        ''',
+        # Preenche os contadores com os dados existentes
+        lambda conn: rebuild_stats_counters(conn)
+    ]),
+    (7, 'Agregados por hora e por dia', [
+        '''
+        CREATE TABLE IF NOT EXISTS rollups_hora (
+            metrica TEXT NOT NULL,
+            inicio TEXT NOT NULL,
+            valor REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (metrica, inicio)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS rollups_dia (
+            metrica TEXT NOT NULL,
+            inicio TEXT NOT NULL,
+            valor REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (metrica, inicio)
+        ) WITHOUT ROWID
+        ''',
+        # Último id agregado de cada tabela de origem; o preenchimento é feito pela tarefa periódica
+        '''
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            origem TEXT PRIMARY KEY,
+            ultimo_id INTEGER NOT NULL DEFAULT 0
+        )
+        '''
+    ]),
+    (8, 'Histórico de mudanças de status', [
+        '''
+        CREATE TABLE IF NOT EXISTS status_transitions (
+            id INTEGER PRIMARY KEY,
+            lead_id INTEGER NOT NULL,
+            de TEXT,
+            para TEXT,
+            em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            segundos_anterior REAL
+        )
+        ''',
+        # Sequência de cada lead (cobre o cálculo da etapa mais avançada)
+        'CREATE INDEX IF NOT EXISTS idx_transitions_lead_em ON status_transitions(lead_id, em, para)',
+        # Mediana do tempo em cada status, lida em ordem pelo índice
+        'CREATE INDEX IF NOT EXISTS idx_transitions_de_segundos ON status_transitions(de, segundos_anterior)',
+        # Coorte de leads pela data de criação
+        'CREATE INDEX IF NOT EXISTS idx_transitions_criacao ON status_transitions(em) WHERE de IS NULL',
+        # Gravadas pelos triggers na mesma transação da mudança de status
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_transitions_insert
+        AFTER INSERT ON leads
+        BEGIN
+            INSERT INTO status_transitions (lead_id, de, para, em)
+            VALUES (NEW.id, NULL, NEW.status, COALESCE(NEW.data_criacao, CURRENT_TIMESTAMP));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_transitions_status
+        AFTER UPDATE OF status ON leads
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            INSERT INTO status_transitions (lead_id, de, para, segundos_anterior)
+            VALUES (
+                NEW.id, OLD.status, NEW.status,
+                (julianday(CURRENT_TIMESTAMP) - julianday((
+                    SELECT em FROM status_transitions
+                    WHERE lead_id = NEW.id
+                    ORDER BY em DESC, id DESC
+                    LIMIT 1
+                ))) * 86400.0
+            );
+        END
+        ''',
+        # Leads existentes: apenas a entrada no status atual, na data de criação
+        '''
+        INSERT INTO status_transitions (lead_id, de, para, em)
+        SELECT id, NULL, status, COALESCE(data_criacao, CURRENT_TIMESTAMP) FROM leads
+        '''
+    ]),
+    (9, 'Análise de intenção das mensagens de chat', [
+        # Preenchidas com a análise do modelo; servem de exemplos para o classificador local
+        'ALTER TABLE interacoes ADD COLUMN intencao TEXT',
+        'ALTER TABLE interacoes ADD COLUMN nivel_interesse TEXT',
+        'ALTER TABLE interacoes ADD COLUMN sentimento TEXT',
+        'CREATE INDEX IF NOT EXISTS idx_interacoes_rotuladas ON interacoes(id) WHERE intencao IS NOT NULL'
+    ]),
+    (10, 'Remoção de índices de leads substituídos pelos de cursor', [
+        # Cobertos por idx_leads_status_score_id e idx_leads_score_id (migração 4); cada
+        # índice a menos é uma árvore a menos para atualizar a cada novo score
+        'DROP INDEX IF EXISTS idx_leads_status_score',
+        'DROP INDEX IF EXISTS idx_leads_score_data'
+    ]),
+    (11, 'Interações que a gravação em lote não conseguiu gravar', [
+        # Separadas após banco_dados.write_behind.max_tentativas falhas seguidas,
+        # para não bloquear a fila; ficam aqui para análise e nova gravação manual
+        '''
+        CREATE TABLE IF NOT EXISTS interacoes_falhas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER,
+            tipo TEXT,
+            mensagem TEXT,
+            resposta TEXT,
+            data TIMESTAMP,
+            intencao TEXT,
+            nivel_interesse TEXT,
+            sentimento TEXT,
+            erro TEXT,
+            registrada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    ])
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Retorna a versão atual do esquema
+    
+    Args:
+        conn: Conexão com o banco
+        
+    Returns:
+        Maior versão aplicada (0 se nenhuma)
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(versao), 0) FROM schema_version').fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection) -> List[int]:
+    """Aplica as migrações pendentes, cada uma em sua própria transação
+    
+    Args:
+        conn: Conexão com o banco
+        
+    Returns:
+        Versões aplicadas nesta execução
+    """
+    applied = []
+    if get_schema_version(conn) >= MIGRATIONS[-1][0]:
+        return applied
+    
+    for version, description, statements in MIGRATIONS:
+        # BEGIN IMMEDIATE serializa processos que iniciam ao mesmo tempo
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(
+                'INSERT INTO schema_version (versao, descricao) VALUES (?, ?)',
+                (version, description)
+            )
+            conn.commit()
+            applied.append(version)
+        except Exception:
+            conn.rollback()
+            raise
+    
+    return applied
+
+
+if __name__ == "__main__":
+    print("Migrações de esquema VENDEXA carregadas com sucesso!")
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Agregados Temporais
+Interações e vendas agregadas por hora e por dia, atualizadas de forma incremental
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+DEFAULT_ROLLUP_SETTINGS = {
+    'ativo': True,
+    'intervalo_segundos': 60,
+    'tamanho_lote': 5000
+}
+
+# Tabelas de origem: coluna de data e métricas (nome -> expressão agregada)
+ROLLUP_SOURCES = {
+    'interacoes': ('data', {'interacoes': 'COUNT(*)'}),
+    'vendas': ('data_fechamento', {'vendas': 'COUNT(*)', 'receita': 'COALESCE(SUM(valor), 0)'})
+}
+
+# Granularidades: tabela, formato do início do intervalo e passo
+ROLLUP_BUCKETS = {
+    'hora': ('rollups_hora', '%Y-%m-%d %H:00:00', timedelta(hours=1)),
+    'dia': ('rollups_dia', '%Y-%m-%d', timedelta(days=1))
+}
+
+METRICS = tuple(metric for _, metrics in ROLLUP_SOURCES.values() for metric in metrics)
+
+# Limite de pontos por consulta de série temporal
+MAX_POINTS = 10000
+
+
+def rollup_settings(manager) -> Dict:
+    """Retorna as configurações dos agregados
+    
+    Args:
+        manager: ConnectionManager do banco
+        
+    Returns:
+        Configurações da seção banco_dados.rollups, com valores padrão
+    """
+    settings = dict(DEFAULT_ROLLUP_SETTINGS)
+    settings.update(manager.settings.get('rollups', {}))
+    return settings
+
+
+def rollup_watermark(conn, source: str) -> int:
+    """Retorna o último id já agregado de uma tabela de origem
+    
+    Args:
+        conn: Conexão com o banco
+        source: Tabela de origem
+        
+    Returns:
+        Watermark da tabela (0 se nada foi agregado)
+    """
+    row = conn.execute('SELECT ultimo_id FROM rollup_watermarks WHERE origem = ?', (source,)).fetchone()
+    return row[0] if row else 0
+
+
+def _rollup_batch(conn, source: str, batch_size: int) -> int:
+    """Agrega o próximo lote de uma tabela de origem, em uma transação
+    
+    Args:
+        conn: Conexão com o banco
+        source: Tabela de origem
+        batch_size: Linhas por lote
+        
+    Returns:
+        Quantidade de linhas agregadas (0 quando não há linhas novas)
+    """
+    date_column, metrics = ROLLUP_SOURCES[source]
+    
+    # BEGIN IMMEDIATE: duas execuções simultâneas não agregam o mesmo lote
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        watermark = rollup_watermark(conn, source)
+        bounds = conn.execute(f'''
+            SELECT MAX(id), COUNT(*) FROM (
+                SELECT id FROM {source} WHERE id > ? ORDER BY id LIMIT ?
+            )
+        ''', (watermark, batch_size)).fetchone()
+        upper, count = bounds[0], bounds[1]
+        if not count:
+            conn.rollback()
+            return 0
+        
+        for table, date_format, _ in ROLLUP_BUCKETS.values():
+            for metric, expression in metrics.items():
+                conn.execute(f'''
+                    INSERT INTO {table} (metrica, inicio, valor)
+                    SELECT ?, strftime('{date_format}', {date_column}), {expression}
+                    FROM {source}
+                    WHERE id > ? AND id <= ? AND {date_column} IS NOT NULL
+                    GROUP BY 2
+                    ON CONFLICT(metrica, inicio) DO UPDATE SET valor = valor + excluded.valor
+                ''', (metric, watermark, upper))
+        
+        conn.execute('''
+            INSERT INTO rollup_watermarks (origem, ultimo_id) VALUES (?, ?)
+            ON CONFLICT(origem) DO UPDATE SET ultimo_id = excluded.ultimo_id
+        ''', (source, upper))
+        conn.commit()
+        return count
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def update_rollups(manager, batch_size: Optional[int] = None) -> Dict:
+    """Agrega as linhas inseridas desde a última execução
+    
+    Cada tabela de origem guarda o último id agregado (watermark), então
+    cada linha é contada uma única vez, inclusive as que chegam com data
+    antiga (gravação em lote). Interações arquivadas depois de agregadas
+    permanecem nos agregados.
+    
+    Args:
+        manager: ConnectionManager do banco
+        batch_size: Linhas por transação (padrão: configuração)
+        
+    Returns:
+        Linhas agregadas por tabela de origem e duração
+    """
+    batch_size = batch_size or rollup_settings(manager)['tamanho_lote']
+    conn = manager.get_connection()
+    summary = {source: 0 for source in ROLLUP_SOURCES}
+    started = time.perf_counter()
+    
+    for source in ROLLUP_SOURCES:
+        while True:
+            with manager.local_write():
+                count = _rollup_batch(conn, source, batch_size)
+            summary[source] += count
+            if count < batch_size:
+                break
+    
+    summary['seconds'] = round(time.perf_counter() - started, 4)
+    return summary
+
+
+def _parse_time(value: Optional[str], default: datetime) -> datetime:
+    """Converte uma data ISO (YYYY-MM-DD ou YYYY-MM-DD HH:MM:SS) em datetime UTC sem fuso
+    
+    Args:
+        value: Texto da data (None usa o padrão)
+        default: Valor padrão
+        
+    Returns:
+        Data convertida
+    """
+    if not value:
+        return default
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Data inválida: {value}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _bucket_start(moment: datetime, bucket: str) -> datetime:
+    """Arredonda uma data para o início do intervalo"""
+    if bucket == 'dia':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def get_timeseries(conn, metric: str, start: Optional[str] = None, end: Optional[str] = None,
+                   bucket: str = 'dia') -> Dict:
+    """Retorna a série temporal de uma métrica, lendo apenas os agregados
+    
+    Intervalos sem registros aparecem com valor 0. As datas são em UTC,
+    como as colunas de data do banco.
+    
+    Args:
+        conn: Conexão com o banco
+        metric: Métrica (interacoes, vendas ou receita)
+        start: Início (padrão: 30 dias ou 48 horas antes do fim)
+        end: Fim, inclusivo (padrão: agora)
+        bucket: Granularidade ('hora' ou 'dia')
+        
+    Returns:
+        Métrica, granularidade, intervalo e lista de pontos {inicio, valor}
+        
+    Raises:
+        ValueError: Métrica, granularidade ou datas inválidas
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Métrica inválida: {metric} (use {', '.join(METRICS)})")
+    if bucket not in ROLLUP_BUCKETS:
+        raise ValueError(f"Granularidade inválida: {bucket} (use {', '.join(ROLLUP_BUCKETS)})")
+    table, date_format, step = ROLLUP_BUCKETS[bucket]
+    
+    end_time = _bucket_start(_parse_time(end, datetime.now(timezone.utc).replace(tzinfo=None)), bucket)
+    default_span = timedelta(days=30) if bucket == 'dia' else timedelta(hours=48)
+    start_time = _bucket_start(_parse_time(start, end_time - default_span), bucket)
+    if start_time > end_time:
+        raise ValueError('O início deve ser anterior ao fim')
+    if (end_time - start_time) / step >= MAX_POINTS:
+        raise ValueError(f'Intervalo muito longo: máximo de {MAX_POINTS} pontos')
+    
+    values = dict(conn.execute(f'''
+        SELECT inicio, valor FROM {table}
+        WHERE metrica = ? AND inicio >= ? AND inicio <= ?
+    ''', (metric, start_time.strftime(date_format), end_time.strftime(date_format))).fetchall())
+    
+    points: List[Dict] = []
+    moment = start_time
+    while moment <= end_time:
+        key = moment.strftime(date_format)
+        points.append({'inicio': key, 'valor': values.get(key, 0)})
+        moment += step
+    
+    return {
+        'metric': metric,
+        'bucket': bucket,
+        'from': start_time.strftime(date_format),
+        'to': end_time.strftime(date_format),
+        'points': points
+    }
+
+
+def merge_timeseries(series: List[Dict]) -> Dict:
+    """Soma séries da mesma métrica e intervalo (uma por partição)
+    
+    Args:
+        series: Resultados de get_timeseries com os mesmos parâmetros
+        
+    Returns:
+        Série com os valores somados ponto a ponto
+    """
+    totals = {}
+    for result in series:
+        for point in result['points']:
+            totals[point['inicio']] = totals.get(point['inicio'], 0) + point['valor']
+    merged = dict(series[0])
+    merged['points'] = [{'inicio': point['inicio'], 'valor': totals[point['inicio']]} for point in series[0]['points']]
+    return merged
+
+
+def main():
+    """Atualização dos agregados via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.connection import get_connection_manager
+    
+    parser = argparse.ArgumentParser(description='Atualiza os agregados por hora e por dia')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados')
+    parser.add_argument('--tamanho-lote', type=int, default=None, help='Linhas por transação')
+    args = parser.parse_args()
+    
+    manager = get_connection_manager(args.db)
+    manager.ensure_schema()
+    summary = update_rollups(manager, args.tamanho_lote)
+    
+    print(f"Agregados atualizados em {summary['seconds']}s: "
+          + ', '.join(f"{source}: {summary[source]} linhas" for source in ROLLUP_SOURCES))
+
+
+if __name__ == "__main__":
+    main()
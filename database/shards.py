@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Armazenamento Particionado
+Distribui leads e interações em vários arquivos SQLite para paralelizar escritas
+"""
+
+import argparse
+import os
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_SHARD_SETTINGS = {
+    'ativo': False,
+    'quantidade': 4
+}
+
+# Tabelas copiadas por split_database, na ordem de cópia. As interações vêm
+# antes dos leads para que o trigger de contagem não as conte em dobro; o
+# histórico de status vem depois e substitui o gerado pelo trigger de inserção.
+SHARDED_TABLES = (
+    ('interacoes', 'lead_id'),
+    ('vendas', 'lead_id'),
+    ('leads', 'id'),
+    ('status_transitions', 'lead_id')
+)
+
+
+def shard_settings(settings: Optional[Dict] = None) -> Dict:
+    """Retorna as configurações de particionamento
+    
+    Args:
+        settings: Seção banco_dados (padrão: config.json)
+        
+    Returns:
+        Configurações da seção banco_dados.shards, com valores padrão
+    """
+    from database.connection import load_database_settings
+    
+    result = dict(DEFAULT_SHARD_SETTINGS)
+    result.update((settings or load_database_settings()).get('shards', {}))
+    return result
+
+
+def email_shard(email: Optional[str], count: int) -> int:
+    """Retorna a partição de um lead pelo email
+    
+    Usa CRC32, estável entre processos (ao contrário de hash()).
+    
+    Args:
+        email: Email do lead
+        count: Quantidade de partições
+        
+    Returns:
+        Índice da partição
+    """
+    return zlib.crc32((email or '').encode('utf-8')) % count
+
+
+def shard_paths(db_path: str, count: int) -> List[str]:
+    """Retorna os arquivos das partições de um banco
+    
+    Args:
+        db_path: Caminho do banco principal
+        count: Quantidade de partições
+        
+    Returns:
+        Caminhos <banco>_shard<i>.db, i de 0 a count - 1
+    """
+    base, extension = os.path.splitext(db_path)
+    return [f'{base}_shard{index}{extension or ".db"}' for index in range(count)]
+
+
+class ShardSet:
+    """Conjunto de bancos que armazenam os leads, particionados por ID
+    
+    O lead fica na partição lead_id % N. Novos leads e os migrados por
+    split_database vão para a partição do hash do email, o que mantém a
+    unicidade do email em uma única partição, e recebem um ID com esse
+    resto. Com uma única partição, o conjunto é apenas o banco principal.
+    """
+    
+    def __init__(self, managers: List):
+        """Inicializa o conjunto
+        
+        Args:
+            managers: ConnectionManager de cada partição, na ordem
+        """
+        self.managers = managers
+        self.count = len(managers)
+        self.sharded = self.count > 1
+        self._executor = ThreadPoolExecutor(self.count, 'vendexa-shard') if self.sharded else None
+    
+    def ensure_schema(self):
+        """Aplica as migrações em todas as partições"""
+        for manager in self.managers:
+            manager.ensure_schema()
+    
+    def index_for_lead(self, lead_id: int) -> int:
+        """Retorna a partição de um lead pelo ID"""
+        return int(lead_id) % self.count
+    
+    def index_for_email(self, email: str) -> int:
+        """Retorna a partição de um lead pelo email"""
+        if not self.sharded:
+            return 0
+        return email_shard(email, self.count)
+    
+    def for_lead(self, lead_id: int):
+        """Retorna o ConnectionManager da partição de um lead"""
+        return self.managers[self.index_for_lead(lead_id)]
+    
+    def insert_id(self, index: int) -> Tuple[str, str, List]:
+        """Fragmentos SQL para gerar o ID de um novo lead na partição
+        
+        O próximo ID é o maior da partição mais N, o que preserva o resto
+        da divisão por N. Sem particionamento, o AUTOINCREMENT é mantido.
+        
+        Args:
+            index: Índice da partição
+            
+        Returns:
+            (coluna, valor, parâmetros) a incluir no INSERT INTO leads
+        """
+        if not self.sharded:
+            return '', '', []
+        return 'id, ', '(SELECT COALESCE(MAX(id), ?) + ? FROM leads), ', [index, self.count]
+    
+    def scatter(self, func: Callable) -> List:
+        """Executa uma função em todas as partições, em paralelo
+        
+        Args:
+            func: Função que recebe o ConnectionManager de uma partição
+            
+        Returns:
+            Resultados, na ordem das partições
+        """
+        if not self.sharded:
+            return [func(self.managers[0])]
+        return list(self._executor.map(func, self.managers))
+
+
+_shard_sets = {}
+_shard_sets_lock = threading.Lock()
+
+
+def get_shard_set(db_path: str) -> ShardSet:
+    """Retorna o conjunto de partições compartilhado de um banco
+    
+    Com banco_dados.shards.ativo desligado, o conjunto contém apenas o
+    próprio banco.
+    
+    Args:
+        db_path: Caminho do banco principal
+        
+    Returns:
+        ShardSet do banco
+    """
+    from database.connection import get_connection_manager
+    
+    key = os.path.abspath(db_path)
+    with _shard_sets_lock:
+        shard_set = _shard_sets.get(key)
+        if shard_set is None:
+            settings = shard_settings()
+            if settings['ativo'] and int(settings['quantidade']) > 1:
+                paths = shard_paths(db_path, int(settings['quantidade']))
+            else:
+                paths = [db_path]
+            shard_set = ShardSet([get_connection_manager(path) for path in paths])
+            _shard_sets[key] = shard_set
+        return shard_set
+
+
+def split_database(db_path: str, count: int) -> List[Dict]:
+    """Distribui os dados de um banco existente entre as partições
+    
+    Cada lead vai para a partição do seu email (a mesma que add_lead
+    consulta), com suas interações, vendas e histórico de status. Como o
+    lead fica na partição lead_id % count, ele recebe um novo ID com esse
+    resto, na mesma ordem dos IDs originais; a correspondência fica na
+    tabela ids_anteriores de cada partição.
+    
+    Args:
+        db_path: Caminho do banco principal
+        count: Quantidade de partições
+        
+    Returns:
+        Leads, interações e vendas copiados para cada partição
+    """
+    from database.connection import get_connection_manager
+    
+    summaries = []
+    for index, path in enumerate(shard_paths(db_path, count)):
+        manager = get_connection_manager(path)
+        manager.ensure_schema()
+        conn = manager.get_connection()
+        if conn.execute('SELECT COUNT(*) FROM leads').fetchone()[0]:
+            raise ValueError(f'A partição {path} já contém leads')
+        
+        conn.create_function('particao_email', 1, lambda email: email_shard(email, count), deterministic=True)
+        conn.execute('ATTACH DATABASE ? AS origem', (db_path,))
+        try:
+            summary = {'shard': path}
+            with conn:
+                conn.execute('DROP TABLE IF EXISTS temp.mapa_ids')
+                conn.execute('CREATE TEMP TABLE mapa_ids (antigo INTEGER PRIMARY KEY, novo INTEGER NOT NULL)')
+                conn.execute('''
+                    INSERT INTO temp.mapa_ids (antigo, novo)
+                    SELECT id, ? + ? * ROW_NUMBER() OVER (ORDER BY id)
+                    FROM origem.leads
+                    WHERE particao_email(email) = ?
+                ''', (index, count, index))
+                
+                for table, key in SHARDED_TABLES:
+                    if table == 'status_transitions':
+                        conn.execute('DELETE FROM main.status_transitions')
+                    columns = [row[1] for row in conn.execute(f'PRAGMA origem.table_info({table})')]
+                    values = ', '.join('mapa_ids.novo' if column == key else f'origem_{table}.{column}'
+                                       for column in columns)
+                    summary[table] = conn.execute(f'''
+                        INSERT INTO main.{table} ({', '.join(columns)})
+                        SELECT {values} FROM origem.{table} AS origem_{table}
+                        JOIN temp.mapa_ids ON mapa_ids.antigo = origem_{table}.{key}
+                    ''').rowcount
+                
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS main.ids_anteriores (
+                        id_anterior INTEGER PRIMARY KEY,
+                        lead_id INTEGER NOT NULL
+                    )
+                ''')
+                conn.execute('INSERT INTO main.ids_anteriores (id_anterior, lead_id) SELECT antigo, novo FROM temp.mapa_ids')
+                conn.execute('DROP TABLE temp.mapa_ids')
+            summaries.append(summary)
+        finally:
+            conn.execute('DETACH DATABASE origem')
+    return summaries
+
+
+def main():
+    """Particionamento de um banco existente via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.connection import get_connection_manager
+    
+    parser = argparse.ArgumentParser(description='Distribui um banco existente entre partições')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados principal')
+    parser.add_argument('--quantidade', type=int, default=None, help='Quantidade de partições (padrão: configuração)')
+    args = parser.parse_args()
+    
+    count = args.quantidade or int(shard_settings()['quantidade'])
+    get_connection_manager(args.db).ensure_schema()
+    for summary in split_database(args.db, count):
+        print(f"{summary['shard']}: {summary['leads']} leads, {summary['interacoes']} interações, "
+              f"{summary['vendas']} vendas")
+    print("Os leads receberam novos IDs; a correspondência está na tabela ids_anteriores de cada partição.")
+    print(f"\nAtive banco_dados.shards (quantidade: {count}) no config.json para usar as partições.")
+
+
+if __name__ == "__main__":
+    main()
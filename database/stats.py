@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Contadores de Estatísticas
+Totais dos painéis mantidos por triggers na tabela stats_counters
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from typing import Dict, Optional
+
+# Prefixo das chaves de contagem de leads por status
+STATUS_PREFIX = 'leads_status:'
+
+# Chaves somadas por triggers; os demais contadores são incluídos por rebuild_stats_counters
+COUNTER_QUERIES = {
+    'leads_total': 'SELECT COUNT(*) FROM leads',
+    'leads_score_soma': 'SELECT COALESCE(SUM(score), 0) FROM leads',
+    'interacoes_total': 'SELECT COUNT(*) FROM interacoes',
+    'vendas_total': 'SELECT COUNT(*) FROM vendas',
+    'vendas_valor': 'SELECT COALESCE(SUM(valor), 0) FROM vendas'
+}
+
+
+def read_counters(conn: sqlite3.Connection) -> Dict[str, float]:
+    """Lê todos os contadores
+    
+    Args:
+        conn: Conexão com o banco
+        
+    Returns:
+        Dicionário chave -> valor
+    """
+    return {row[0]: row[1] for row in conn.execute('SELECT chave, valor FROM stats_counters')}
+
+
+def compute_counters(conn: sqlite3.Connection) -> Dict[str, float]:
+    """Calcula os contadores do zero a partir das tabelas
+    
+    Args:
+        conn: Conexão com o banco
+        
+    Returns:
+        Dicionário chave -> valor (sem interacoes_arquivadas)
+    """
+    counters = {key: conn.execute(query).fetchone()[0] for key, query in COUNTER_QUERIES.items()}
+    for status, total in conn.execute('SELECT COALESCE(status, \'\'), COUNT(*) FROM leads GROUP BY status'):
+        counters[STATUS_PREFIX + status] = total
+    return counters
+
+
+def rebuild_stats_counters(conn: sqlite3.Connection, archived: Optional[int] = None) -> Dict[str, tuple]:
+    """Recalcula os contadores e regrava a tabela
+    
+    Deve ser chamada dentro de uma transação, para que nenhuma escrita
+    ocorra entre o cálculo e a regravação.
+    
+    Args:
+        conn: Conexão com o banco
+        archived: Total de interações no banco de arquivo (None mantém o valor atual)
+        
+    Returns:
+        Divergências encontradas: chave -> (valor gravado, valor correto)
+    """
+    stored = read_counters(conn)
+    expected = compute_counters(conn)
+    expected['interacoes_arquivadas'] = stored.get('interacoes_arquivadas', 0) if archived is None else archived
+    
+    drift = {}
+    for key in set(stored) | set(expected):
+        before, after = stored.get(key, 0), expected.get(key, 0)
+        if abs(before - after) > 1e-6:
+            drift[key] = (before, after)
+    
+    conn.execute('DELETE FROM stats_counters')
+    conn.executemany(
+        'INSERT INTO stats_counters (chave, valor) VALUES (?, ?)',
+        [(key, value) for key, value in expected.items() if value]
+    )
+    return drift
+
+
+def add_archived_interactions(conn: sqlite3.Connection, count: int):
+    """Registra interações movidas para o banco de arquivo
+    
+    A remoção no banco principal decrementa interacoes_total pelo trigger;
+    este contador mantém o total geral de interações.
+    
+    Args:
+        conn: Conexão com o banco, na mesma transação da remoção
+        count: Quantidade de interações arquivadas
+    """
+    conn.execute('''
+        INSERT INTO stats_counters (chave, valor) VALUES ('interacoes_arquivadas', ?)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + excluded.valor
+    ''', (count,))
+
+
+def leads_by_status(counters: Dict[str, float]) -> Dict[Optional[str], int]:
+    """Extrai a contagem de leads por status dos contadores
+    
+    Args:
+        counters: Resultado de read_counters
+        
+    Returns:
+        Dicionário status -> quantidade (somente status com leads)
+    """
+    return {
+        (key[len(STATUS_PREFIX):] or None): int(value)
+        for key, value in counters.items()
+        if key.startswith(STATUS_PREFIX) and value
+    }
+
+
+def read_shard_counters(shard_set) -> Dict[str, float]:
+    """Lê e soma os contadores de todas as partições
+    
+    Args:
+        shard_set: ShardSet do banco
+        
+    Returns:
+        Dicionário chave -> soma dos valores
+    """
+    totals = {}
+    def read(manager):
+        with manager.reader() as conn:
+            return read_counters(conn)
+    
+    for counters in shard_set.scatter(read):
+        for key, value in counters.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def get_statistics(conn: sqlite3.Connection) -> Dict:
+    """Monta as estatísticas gerais a partir dos contadores
+    
+    Args:
+        conn: Conexão com o banco
+        
+    Returns:
+        Totais de leads, interações (incluindo arquivadas) e vendas, e score médio
+    """
+    return statistics_from_counters(read_counters(conn))
+
+
+def statistics_from_counters(counters: Dict[str, float]) -> Dict:
+    """Monta as estatísticas gerais a partir de contadores já lidos
+    
+    Args:
+        counters: Resultado de read_counters ou read_shard_counters
+        
+    Returns:
+        Totais de leads, interações (incluindo arquivadas) e vendas, e score médio
+    """
+    total_leads = int(counters.get('leads_total', 0))
+    return {
+        'total_leads': total_leads,
+        'leads_por_status': leads_by_status(counters),
+        'total_interacoes': int(counters.get('interacoes_total', 0) + counters.get('interacoes_arquivadas', 0)),
+        'total_vendas': int(counters.get('vendas_total', 0)),
+        'valor_total_vendas': counters.get('vendas_valor', 0),
+        'score_medio': round(counters.get('leads_score_soma', 0) / total_leads, 2) if total_leads else 0
+    }
+
+
+def main():
+    """Verificação e reconstrução dos contadores via linha de comando"""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.archive import count_archived_interactions
+    from database.connection import get_connection_manager
+    
+    parser = argparse.ArgumentParser(description='Recalcula os contadores de estatísticas e mostra divergências')
+    parser.add_argument('--db', default='data/leads.db', help='Banco de dados')
+    parser.add_argument('--verificar', action='store_true', help='Apenas verifica, sem regravar os contadores')
+    args = parser.parse_args()
+    
+    manager = get_connection_manager(args.db)
+    manager.ensure_schema()
+    conn = manager.get_connection()
+    
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        drift = rebuild_stats_counters(conn, count_archived_interactions(manager))
+        if args.verificar:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    if not drift:
+        print("Contadores consistentes.")
+        return
+    for key, (before, after) in sorted(drift.items()):
+        print(f"{key}: {before} -> {after}")
+    print(f"\n{len(drift)} contadores divergentes" + (" (não alterados)" if args.verificar else " corrigidos"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+VENDEXA - Planos e Preços
+Catálogo de planos usado no checkout e nas conversas de vendas
+"""
+
+from typing import Dict
+
+# Preços em centavos
+PLANS = {
+    'starter': {
+        'name': 'Starter',
+        'price': 29700,  # R$ 297,00
+        'currency': 'brl',
+        'interval': 'month',
+        'features': [
+            'Até 100 leads/mês',
+            '1.000 conversas/mês',
+            'IA básica',
+            'Email marketing',
+            'Suporte por email'
+        ],
+        'ideal_for': 'Pequenas empresas e startups'
+    },
+    'professional': {
+        'name': 'Professional',
+        'price': 69700,  # R$ 697,00
+        'currency': 'brl',
+        'interval': 'month',
+        'features': [
+            'Até 500 leads/mês',
+            '5.000 conversas/mês',
+            'IA avançada',
+            'Email + WhatsApp',
+            'Suporte prioritário',
+            'Relatórios avançados'
+        ],
+        'ideal_for': 'Médias empresas',
+        'highlight': 'MAIS POPULAR'
+    },
+    'enterprise': {
+        'name': 'Enterprise',
+        'price': 149700,  # R$ 1.497,00
+        'currency': 'brl',
+        'interval': 'month',
+        'features': [
+            'Leads ilimitados',
+            'Conversas ilimitadas',
+            'IA personalizada',
+            'Todos os canais',
+            'Suporte 24/7',
+            'API dedicada',
+            'Customizações'
+        ],
+        'ideal_for': 'Grandes empresas'
+    }
+}
+
+INTERVAL_LABELS = {
+    'month': 'mês',
+    'year': 'ano'
+}
+
+
+def format_price(plan: Dict) -> str:
+    """Formata o preço de um plano em reais
+    
+    Args:
+        plan: Plano de PLANS
+        
+    Returns:
+        Preço no formato "R$ 1.497/mês" (centavos só quando existem)
+    """
+    reais, cents = divmod(plan['price'], 100)
+    text = f"{reais:,}".replace(',', '.')
+    if cents:
+        text += f",{cents:02d}"
+    return f"R$ {text}/{INTERVAL_LABELS.get(plan['interval'], plan['interval'])}"
+
+
+if __name__ == "__main__":
+    for plan in PLANS.values():
+        print(f"{plan['name']} - {format_price(plan)}")
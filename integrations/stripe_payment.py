@@ -5,10 +5,13 @@ Processa pagamentos e assinaturas
 """
 
 import stripe
+import copy
 import json
 import os
 from typing import Dict, Optional
 
+from integrations.plans import PLANS
+
 class StripePayment:
     """Gerencia pagamentos via Stripe"""
     
@@ -29,51 +32,8 @@ class StripePayment:
             except:
                 pass
         
-        # Planos disponíveis
-        self.plans = {
-            'starter': {
-                'name': 'Starter',
-                'price': 29700,  # em centavos (R$ 297,00)
-                'currency': 'brl',
-                'interval': 'month',
-                'features': [
-                    'Até 100 leads/mês',
-                    '1.000 conversas/mês',
-                    'IA básica',
-                    'Email marketing',
-                    'Suporte por email'
-                ]
-            },
-            'professional': {
-                'name': 'Professional',
-                'price': 69700,  # R$ 697,00
-                'currency': 'brl',
-                'interval': 'month',
-                'features': [
-                    'Até 500 leads/mês',
-                    '5.000 conversas/mês',
-                    'IA avançada',
-                    'Email + WhatsApp',
-                    'Suporte prioritário',
-                    'Relatórios avançados'
-                ]
-            },
-            'enterprise': {
-                'name': 'Enterprise',
-                'price': 149700,  # R$ 1.497,00
-                'currency': 'brl',
-                'interval': 'month',
-                'features': [
-                    'Leads ilimitados',
-                    'Conversas ilimitadas',
-                    'IA personalizada',
-                    'Todos os canais',
-                    'Suporte 24/7',
-                    'API dedicada',
-                    'Customizações'
-                ]
-            }
-        }
+        # Planos disponíveis (catálogo compartilhado com o prompt de vendas)
+        self.plans = copy.deepcopy(PLANS)
     
     def create_checkout_session(self, plan_id: str, customer_email: str, 
                                success_url: str, cancel_url: str) -> Dict:
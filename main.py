@@ -92,6 +92,9 @@ class VendexaSystem:
             )
             logger.info("Conversation Manager inicializado")
             
+            training = self.conversation_manager.train_intent_classifier()
+            logger.info(f"Classificador de intenção treinado com {training['examples']} exemplos")
+            
             # Sales Closer
             self.sales_closer = SalesCloser(
                 self.prospector, 
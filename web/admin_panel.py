@@ -9,15 +9,40 @@ from functools import wraps
 import hashlib
 import json
 import os
+import threading
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+DB_PATH = 'data/leads.db'
+
 # Credenciais do admin (em produção, usar banco de dados)
 ADMIN_CREDENTIALS = {
     'username': 'admin',
     'password': hashlib.sha256('vendexa2026'.encode()).hexdigest()  # Senha: vendexa2026
 }
 
+_prospector = None
+_prospector_lock = threading.Lock()
+
+def set_prospector(prospector):
+    """Define o prospector usado pelas rotas do painel
+    
+    A aplicação registra aqui a sua instância, para que alterações feitas
+    pelo painel (ex.: novos pesos de score) valham também para as conversas.
+    """
+    global _prospector
+    with _prospector_lock:
+        _prospector = prospector
+
+def get_prospector():
+    """Retorna o prospector compartilhado pelas rotas do painel"""
+    global _prospector
+    with _prospector_lock:
+        if _prospector is None:
+            from core.prospector import Prospector
+            _prospector = Prospector(DB_PATH)
+        return _prospector
+
 def login_required(f):
     """Decorator para rotas que requerem login"""
     @wraps(f)
@@ -71,25 +96,70 @@ def get_stats():
     """Retorna estatísticas para o dashboard"""
     from database.db_manager import DatabaseManager
     
-    db_path = 'data/leads.db'
-    db = DatabaseManager(db_path)
+    db = DatabaseManager(DB_PATH)
     stats = db.get_statistics()
     
     return jsonify(stats)
 
+@admin_bp.route('/api/rescore', methods=['POST'])
+@login_required
+def rescore_leads():
+    """Recalcula o score de todos os leads com os pesos atuais"""
+    chunk_size = request.args.get('chunk_size', 5000, type=int)
+    if chunk_size is None or chunk_size <= 0:
+        return jsonify({'success': False, 'error': 'chunk_size deve ser um inteiro positivo'}), 400
+    summary = get_prospector().rescore_all_leads(chunk_size)
+    
+    return jsonify(summary)
+
+@admin_bp.route('/api/search')
+@login_required
+def search_interactions():
+    """Busca textual nas conversas e propostas"""
+    query = request.args.get('q', '')
+    lead_id = request.args.get('lead_id', type=int)
+    limit = request.args.get('limit', 20, type=int)
+    
+    results = get_prospector().search_interactions(query, lead_id, limit)
+    
+    return jsonify(results)
+
+@admin_bp.route('/api/timeseries')
+@login_required
+def get_timeseries():
+    """Série temporal de interações, vendas ou receita, lida dos agregados"""
+    from database.rollups import get_timeseries as read_timeseries, merge_timeseries
+    
+    def read(manager):
+        with manager.reader() as conn:
+            return read_timeseries(
+                conn,
+                request.args.get('metric', 'interacoes'),
+                request.args.get('from'),
+                request.args.get('to'),
+                request.args.get('bucket', 'dia')
+            )
+    
+    try:
+        series = [read(manager) for manager in get_prospector().shards.managers]
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify(merge_timeseries(series))
+
+@admin_bp.route('/api/funnel')
+@login_required
+def get_funnel():
+    """Funil de vendas: conversão entre etapas e mediana de tempo em cada uma"""
+    funnel = get_prospector().get_funnel(request.args.get('desde'), request.args.get('ate'))
+    
+    return jsonify(funnel)
+
 @admin_bp.route('/api/leads')
 @login_required
 def get_leads():
     """Lista todos os leads"""
-    import sqlite3
-    
-    conn = sqlite3.connect('data/leads.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM leads ORDER BY data_criacao DESC LIMIT 100')
-    leads = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    leads = get_prospector().list_leads('recentes', limit=100)['leads']
     
     return jsonify(leads)
 
@@ -97,21 +167,7 @@ def get_leads():
 @login_required
 def get_recent_interactions():
     """Retorna interações recentes"""
-    import sqlite3
-    
-    conn = sqlite3.connect('data/leads.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT i.*, l.nome, l.email 
-        FROM interacoes i
-        JOIN leads l ON i.lead_id = l.id
-        ORDER BY i.data DESC
-        LIMIT 50
-    ''')
-    interactions = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    interactions = get_prospector().get_recent_interactions(50)
     
     return jsonify(interactions)
 
@@ -4,10 +4,11 @@ VENDEXA - API Web
 Interface web para gerenciar o sistema
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
 from flask_cors import CORS
 import sys
 import os
+import io
 import json
 import secrets
 
@@ -18,6 +19,12 @@ from core.ai_engine import AIEngine
 from core.prospector import Prospector
 from core.conversation import ConversationManager
 from core.sales_closer import SalesCloser
+from core.lead_importer import detect_format, iter_leads
+from core.scheduler import PeriodicJob
+from database.backup import backup_settings, run_backup
+from database.connection import release_dead_thread_connections
+from database.export import export_ndjson
+from database.rollups import rollup_settings, update_rollups
 from integrations.email_sender import EmailSender
 
 app = Flask(__name__)
@@ -25,7 +32,7 @@ app.secret_key = secrets.token_hex(32)
 CORS(app)
 
 # Registra blueprint do admin
-from web.admin_panel import admin_bp
+from web.admin_panel import admin_bp, set_prospector
 app.register_blueprint(admin_bp)
 
 # Configurações
@@ -43,10 +50,38 @@ with open(API_KEYS_PATH, 'r', encoding='utf-8') as f:
 # Inicializa componentes
 ai_engine = AIEngine(api_keys['google_gemini']['api_key'])
 prospector = Prospector(DB_PATH)
+# O painel usa a mesma instância (mesmos pesos de score e cache de leads)
+set_prospector(prospector)
 conversation_manager = ConversationManager(ai_engine, prospector)
 sales_closer = SalesCloser(prospector, conversation_manager)
 email_sender = EmailSender()
 
+# Tarefas periódicas (executadas em cada partição, se o banco for particionado)
+jobs = {}
+rollup_config = rollup_settings(prospector.db)
+if rollup_config['ativo']:
+    jobs['rollups'] = PeriodicJob(
+        'rollups', rollup_config['intervalo_segundos'],
+        lambda: [update_rollups(shard) for shard in prospector.shards.managers]
+    ).start()
+backup_config = backup_settings(prospector.db)
+if backup_config['ativo']:
+    jobs['backup'] = PeriodicJob(
+        'backup', backup_config['intervalo_horas'] * 3600,
+        lambda: [run_backup(shard, backup_config) for shard in prospector.shards.managers],
+        run_at_start=False
+    ).start()
+
+classifier_config = ai_engine.intent_classifier.settings
+if classifier_config['ativo']:
+    jobs['intent_classifier'] = PeriodicJob(
+        'intent_classifier', classifier_config['retreino_minutos'] * 60,
+        conversation_manager.train_intent_classifier
+    ).start()
+
+# Conexões de threads encerradas (requisições, pools) são fechadas periodicamente
+jobs['connections'] = PeriodicJob('connections', 60, release_dead_thread_connections, run_at_start=False).start()
+
 @app.route('/')
 def index():
     """Página inicial"""
@@ -59,17 +94,28 @@ def index():
 
 @app.route('/api/leads', methods=['GET'])
 def get_leads():
-    """Lista todos os leads"""
+    """Lista os leads com paginação por cursor
+    
+    Parâmetros: order (recentes|score), cursor, limit, fields, status,
+    min_score e max_score. Campos e status aceitam listas separadas por vírgula.
+    """
     try:
-        import sqlite3
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM leads ORDER BY data_criacao DESC')
-        leads = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        fields = request.args.get('fields')
+        status = request.args.get('status')
         
-        return jsonify({'success': True, 'leads': leads})
+        page = prospector.list_leads(
+            order_by=request.args.get('order', 'recentes'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 50, type=int),
+            fields=fields.split(',') if fields else None,
+            status=status.split(',') if status else None,
+            min_score=request.args.get('min_score', type=int),
+            max_score=request.args.get('max_score', type=int)
+        )
+        
+        return jsonify({'success': True, 'leads': page['leads'], 'next_cursor': page['next_cursor']})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -98,6 +144,49 @@ def create_lead():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/leads/import', methods=['POST'])
+def import_leads():
+    """Importa leads em lote a partir de um arquivo CSV ou JSONL"""
+    try:
+        chunk_size = request.args.get('chunk_size', 1000, type=int)
+        if chunk_size is None or chunk_size <= 0:
+            return jsonify({'success': False, 'error': 'chunk_size deve ser um inteiro positivo'}), 400
+        
+        if 'file' in request.files:
+            upload = request.files['file']
+            file_format = request.args.get('format') or detect_format(upload.filename)
+            raw_stream = upload.stream
+        else:
+            file_format = request.args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'jsonl')
+            raw_stream = request.stream
+        
+        stream = io.TextIOWrapper(raw_stream, encoding='utf-8-sig', newline='')
+        chunks = []
+        summary = prospector.add_leads_bulk(iter_leads(stream, file_format), chunk_size, chunks.append)
+        summary['chunk_stats'] = chunks
+        
+        return jsonify({'success': True, 'summary': summary})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/export/leads', methods=['GET'])
+def export_leads():
+    """Exporta leads e histórico em NDJSON, em fluxo contínuo
+    
+    Parâmetros: historico=0 para omitir as interações e gzip=1 para comprimir.
+    """
+    include_history = request.args.get('historico', '1') != '0'
+    compress = request.args.get('gzip', '0') == '1'
+    filename = 'leads.ndjson.gz' if compress else 'leads.ndjson'
+    
+    return Response(
+        stream_with_context(export_ndjson(prospector.shards.managers, include_history, compress)),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @app.route('/api/leads/<int:lead_id>', methods=['GET'])
 def get_lead(lead_id):
     """Busca um lead específico"""
@@ -135,11 +224,51 @@ def send_message(lead_id):
             'success': True,
             'response': result['response'],
             'intent': result['intent'],
-            'score': result['score']
+            'score': result['score'],
+            'timings': result['timings']
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/conversation/stream/<int:lead_id>', methods=['POST'])
+def stream_message(lead_id):
+    """Envia uma mensagem e transmite a resposta via Server-Sent Events
+    
+    Eventos: "chunk" ({text}) a cada parte da resposta, "done" (mesmo
+    conteúdo de /api/conversation/message) ao final e "error" em caso de falha.
+    """
+    try:
+        data = request.json
+        user_message = data.get('message', '')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+    
+    def generate():
+        try:
+            for event in conversation_manager.stream_message(lead_id, user_message):
+                if event['type'] == 'chunk':
+                    yield sse('chunk', {'text': event['text']})
+                else:
+                    yield sse('done', {
+                        'success': True,
+                        'response': event['response'],
+                        'intent': event['intent'],
+                        'score': event['score'],
+                        'timings': event['timings']
+                    })
+        except Exception as e:
+            yield sse('error', {'success': False, 'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Sem cache nem buffer de proxy: cada parte chega ao cliente ao ser gerada
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/proposal/generate/<int:lead_id>', methods=['POST'])
 def generate_proposal(lead_id):
     """Gera uma proposta comercial"""
@@ -200,6 +329,28 @@ def get_hot_leads():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Retorna métricas internas de desempenho"""
+    return jsonify({
+        'success': True,
+        'metrics': {
+            'lead_cache': prospector.lead_cache.stats(),
+            'chat_sessions': ai_engine.chat_sessions.stats(),
+            'intent_classifier': ai_engine.intent_classifier.stats(),
+            'intent_cache': ai_engine.intent_cache.stats() if ai_engine.intent_cache else None,
+            'chat_turns': ai_engine.turn_stats(),
+            'interaction_writer': prospector.interaction_writer.stats() if prospector.interaction_writer else None,
+            'jobs': {name: job.stats() for name, job in jobs.items()},
+            'read_pool': {
+                os.path.basename(shard.db_path): shard.read_pool().stats() for shard in prospector.shards.managers
+            },
+            'thread_connections': {
+                os.path.basename(shard.db_path): shard.open_connection_count() for shard in prospector.shards.managers
+            }
+        }
+    })
+
 # Rotas de Pagamento (Stripe)
 @app.route('/api/plans', methods=['GET'])
 def get_plans():